@@ -0,0 +1,344 @@
+"""Many snakes on one board: local players plus bots.
+
+Every snake and every food item is marked in one shared owner grid, a
+flat array holding the id of whatever covers each cell. A move is then
+resolved by looking at its destination cell alone: a body (any snake's,
+including its own) kills, two heads claiming the same cell both die,
+and food is eaten. Nothing scans another snake's body, so a tick costs
+O(snakes) however long they grow.
+
+Ticks are simultaneous: every snake picks its direction, tails that are
+not growing leave their cells, then all heads move at once. Crashed
+snakes drop food along their bodies and respawn after a delay. With
+log=True each tick's changes are also collected in a TickLog, which is
+all a remote copy needs to follow along (see server.py). Running this
+module plays headless bot games:
+
+    python arena.py --snakes 200 --cols 200 --rows 200 --ticks 2000
+"""
+import argparse
+import random
+import time
+from array import array
+from collections import deque
+
+import engine
+from engine import DIRECTIONS, OPPOSITE
+
+EMPTY = 0
+FOOD = 0xFFFF  # Owner of a food cell; snakes are numbered 1..MAX_SNAKES
+MAX_SNAKES = FOOD - 1
+START_LENGTH = 3  # New snakes grow out of a single cell to this length
+RESPAWN_TICKS = 30  # Ticks a crashed snake waits before rejoining
+DROP_EVERY = 3  # A crashed snake leaves food on every n-th body cell
+FOOD_SAMPLES = 4  # Food items a bot compares when picking a new target
+
+class ArenaSnake(engine.Steering):
+    """One snake in an arena; cells are flat indices (y * cols + x)."""
+
+    def __init__(self, id, bot=True):
+        self.id = id  # Its value in the owner grid
+        self.bot = bot
+        self.body = deque()  # Head on the left, tail on the right
+        self.direction = "RIGHT"
+        self.input_queue = deque()  # Player turns not yet committed
+        self.growth_pending = 0
+        self.vacated = -1  # Cell the tail left on the last move, or -1
+        self.score = 0
+        self.alive = False
+        self.respawn_tick = 0
+        self.target = None  # Food cell a bot is heading for
+        self.deaths = 0
+
+class TickLog:
+    """What changed during one arena tick, in the order it happened."""
+
+    def __init__(self):
+        self.spawns = []  # (snake id, cell) of snakes that (re)joined
+        self.moves = []  # (snake id, direction, tail left) of heads that moved
+        self.deaths = []  # Ids of snakes that crashed
+        self.food = []  # Cells that gained food (eaten food is implied by moves)
+
+    def clear(self):
+        self.spawns.clear()
+        self.moves.clear()
+        self.deaths.clear()
+        self.food.clear()
+
+class FoodSet:
+    """Food cells with constant-time add, remove and random pick."""
+
+    def __init__(self):
+        self.cells = []
+        self.slot = {}
+
+    def __len__(self):
+        return len(self.cells)
+
+    def add(self, cell):
+        self.slot[cell] = len(self.cells)
+        self.cells.append(cell)
+
+    def remove(self, cell):
+        slot = self.slot.pop(cell)
+        last = self.cells.pop()
+        if last != cell:
+            self.cells[slot] = last
+            self.slot[last] = slot
+
+    def sample(self, rng):
+        return self.cells[rng.randrange(len(self.cells))]
+
+class Arena:
+    def __init__(self, cols=engine.GRID_COLS, rows=engine.GRID_ROWS, snakes=20, players=0,
+                 food=None, seed=None, respawn=True, log=False):
+        if not 0 < snakes <= MAX_SNAKES:
+            raise ValueError(f"an arena holds 1 to {MAX_SNAKES} snakes")
+        self.cols = cols
+        self.rows = rows
+        self.size = cols * rows
+        self.food_target = food if food is not None else snakes  # Food kept on the board
+        self.respawn = respawn
+        self.log = TickLog() if log else None
+        self.snakes = [ArenaSnake(i + 1, bot=i >= players) for i in range(snakes)]
+        self.rng = random.Random()
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        # A fresh random seed is drawn unless one is given
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.rng.seed(self.seed)
+        self.owner = array("H", bytes(2 * self.size))
+        self.grid = engine.Grid(self.cols, self.rows)  # Free cells, for spawning
+        self.food = FoodSet()
+        self.ticks = 0
+        self.deaths = 0
+        self.head_on = 0  # Deaths from two heads meeting
+        for snake in self.snakes:
+            snake.score = 0
+            snake.deaths = 0
+            self.spawn(snake)
+        self.add_food()
+        if self.log is not None:
+            self.log.clear()  # Remote copies need a full state after a reset
+
+    def alive_count(self):
+        return sum(snake.alive for snake in self.snakes)
+
+    def cell_free(self, cell):
+        return self.owner[cell] == EMPTY or self.owner[cell] == FOOD
+
+    def neighbour(self, cell, direction):
+        # Cell one step away, or -1 off the board
+        dx, dy = DIRECTIONS[direction]
+        x, y = cell % self.cols + dx, cell // self.cols + dy
+        if 0 <= x < self.cols and 0 <= y < self.rows:
+            return y * self.cols + x
+        return -1
+
+    def spawn(self, snake):
+        # Start on a random free cell, facing a free neighbour if there is one
+        snake.body.clear()
+        snake.input_queue.clear()
+        snake.target = None
+        free = self.grid.random_free(self.rng)
+        if free is None:
+            snake.alive = False
+            snake.respawn_tick = self.ticks + RESPAWN_TICKS
+            return
+        cell = free[1] * self.cols + free[0]
+        directions = list(DIRECTIONS)
+        self.rng.shuffle(directions)
+        snake.direction = directions[0]
+        for direction in directions:
+            ahead = self.neighbour(cell, direction)
+            if ahead >= 0 and self.owner[ahead] == EMPTY:
+                snake.direction = direction
+                break
+        self.owner[cell] = snake.id
+        self.grid.occupy(cell)
+        snake.body.append(cell)
+        snake.growth_pending = START_LENGTH - 1
+        snake.vacated = -1
+        snake.alive = True
+        if self.log is not None:
+            self.log.spawns.append((snake.id, cell))
+
+    def add_food(self):
+        # Top the food back up to its target, on free cells only
+        while len(self.food) < self.food_target:
+            free = self.grid.random_free(self.rng)
+            if free is None:
+                return
+            self.place_food(free[1] * self.cols + free[0])
+
+    def place_food(self, cell):
+        self.owner[cell] = FOOD
+        self.grid.occupy(cell)
+        self.food.add(cell)
+        if self.log is not None:
+            self.log.food.append(cell)
+
+    def kill(self, snake):
+        # Free the body, leaving some of it behind as food
+        owner, grid = self.owner, self.grid
+        for i, cell in enumerate(snake.body):
+            if i % DROP_EVERY == DROP_EVERY - 1:
+                owner[cell] = FOOD
+                self.food.add(cell)
+                if self.log is not None:
+                    self.log.food.append(cell)
+            else:
+                owner[cell] = EMPTY
+                grid.release(cell)
+        snake.body.clear()
+        snake.alive = False
+        snake.deaths += 1
+        snake.respawn_tick = self.ticks + RESPAWN_TICKS
+        self.deaths += 1
+        if self.log is not None:
+            self.log.deaths.append(snake.id)
+
+    def steer(self, snake):
+        """Bot direction: head for a food target, avoiding bodies, dead
+        ends and cells another head could also move into."""
+        owner = self.owner
+        head = snake.body[0]
+        if snake.target is None or owner[snake.target] != FOOD:
+            snake.target = self.pick_target(head)
+        target = snake.target
+        target_x, target_y = (target % self.cols, target // self.cols) if target is not None else (0, 0)
+
+        best = snake.direction
+        best_key = None
+        for direction in DIRECTIONS:
+            if direction == OPPOSITE[snake.direction]:
+                continue
+            cell = self.neighbour(head, direction)
+            if cell < 0 or not self.cell_free(cell):
+                continue
+            exits = 0
+            contested = False
+            for other in DIRECTIONS:
+                beyond = self.neighbour(cell, other)
+                if beyond < 0 or beyond == head:
+                    continue
+                if self.cell_free(beyond):
+                    exits += 1
+                else:
+                    # Another snake's head next to the cell may move into it too
+                    rival = self.snakes[owner[beyond] - 1]
+                    contested = contested or (rival is not snake and rival.body[0] == beyond)
+            distance = abs(cell % self.cols - target_x) + abs(cell // self.cols - target_y) if target is not None else 0
+            key = (exits == 0, contested, distance)
+            if best_key is None or key < best_key:
+                best, best_key = direction, key
+        return best
+
+    def pick_target(self, head):
+        # Nearest of a few random food items: constant time, and bots
+        # spread out over the food instead of all chasing the same one
+        if not self.food:
+            return None
+        x, y = head % self.cols, head // self.cols
+        best = None
+        best_distance = None
+        for _ in range(FOOD_SAMPLES):
+            cell = self.food.sample(self.rng)
+            distance = abs(cell % self.cols - x) + abs(cell // self.cols - y)
+            if best_distance is None or distance < best_distance:
+                best, best_distance = cell, distance
+        return best
+
+    def step(self):
+        """Advance every snake one move; returns the snakes that crashed."""
+        owner, grid = self.owner, self.grid
+        self.ticks += 1
+
+        # Choose directions and destinations
+        moves = []
+        for snake in self.snakes:
+            if not snake.alive:
+                if self.respawn and self.ticks >= snake.respawn_tick:
+                    self.spawn(snake)
+                continue
+            if snake.bot:
+                snake.change_direction(self.steer(snake))
+            else:
+                snake.commit_direction()
+            moves.append((snake, self.neighbour(snake.body[0], snake.direction)))
+
+        # Tails leave first, so a head may follow any tail into its cell
+        claims = {}
+        for snake, target in moves:
+            if snake.growth_pending > 0:
+                snake.growth_pending -= 1
+                snake.vacated = -1
+            else:
+                snake.vacated = tail = snake.body.pop()
+                owner[tail] = EMPTY
+                grid.release(tail)
+            claims[target] = claims.get(target, 0) + 1
+
+        # Move all heads at once; a cell claimed twice is a head-on crash
+        crashed = []
+        for snake, target in moves:
+            if target < 0 or not self.cell_free(target):
+                crashed.append(snake)
+                continue
+            if claims[target] > 1:
+                self.head_on += 1
+                crashed.append(snake)
+                continue
+            if owner[target] == FOOD:
+                self.food.remove(target)
+                snake.growth_pending += 1
+                snake.score += 10
+            else:
+                grid.occupy(target)
+            owner[target] = snake.id
+            snake.body.appendleft(target)
+            if self.log is not None:
+                self.log.moves.append((snake.id, snake.direction, snake.vacated >= 0))
+
+        for snake in crashed:
+            self.kill(snake)
+        self.add_food()
+        return crashed
+
+def parse_snake_count(text):
+    """argparse type for a number of arena snakes, 1..MAX_SNAKES."""
+    try:
+        count = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected an integer, not {text!r}") from None
+    if not 0 < count <= MAX_SNAKES:
+        raise argparse.ArgumentTypeError(f"an arena holds 1 to {MAX_SNAKES} snakes, not {count}")
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a headless multi-snake arena with bots")
+    parser.add_argument("--snakes", type=parse_snake_count, default=100)
+    parser.add_argument("--cols", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--food", type=int, help="food kept on the board (default: one per snake)")
+    parser.add_argument("--ticks", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    arena = Arena(args.cols, args.rows, args.snakes, food=args.food, seed=args.seed)
+    start = time.perf_counter()
+    for _ in range(args.ticks):
+        arena.step()
+    elapsed = time.perf_counter() - start
+
+    longest = max(arena.snakes, key=lambda snake: len(snake.body))
+    cells = sum(len(snake.body) for snake in arena.snakes)
+    print(f"{args.ticks} ticks with {args.snakes} snakes on {args.cols}x{args.rows}: "
+          f"{args.ticks / elapsed:,.0f} ticks/s, {elapsed / args.ticks / args.snakes * 1e6:.2f} us per snake move")
+    print(f"{arena.deaths} crashes ({arena.head_on} head-on), {arena.alive_count()} alive, "
+          f"{cells} body cells, longest snake {len(longest.body)} (#{longest.id})")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
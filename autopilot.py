@@ -0,0 +1,184 @@
+"""Autopilot that can clear whole boards, for bot play and stress tests.
+
+The bot follows a Hamiltonian cycle, which can never collide, and takes
+shortcuts towards the food when they are provably safe. The body always
+lies along the cycle in order from tail to head, so every cell between
+the head and the tail (going forward along the cycle) is free, and the
+tail is always reachable by following the cycle. A shortcut to a
+neighbour is taken only if the free stretch left ahead stays longer than
+the snake itself, and never jumps past the food on the cycle, so each
+food is reached in under one lap. Cells skipped by shortcuts stay empty
+behind the head until the tail passes them; keeping the stretch ahead
+longer than the body means none are left once the snake covers half the
+board, which is when shortcuts stop and the bot just follows the cycle.
+
+The cycle positions and successors are computed once per board size; a
+decision then checks the four neighbours with a few table lookups,
+whatever the board size. Running this module plays headless games:
+
+    python autopilot.py --games 3 --seed 1
+"""
+import argparse
+import time
+from array import array
+
+import engine
+from engine import DIRECTIONS, OPPOSITE
+
+SAFETY_MARGIN = 3  # Extra free cells kept ahead of the head on shortcuts
+# On 2x2 the snake can spawn facing against the cycle, with no room to
+# rejoin it
+MIN_BOARD_CELLS = 6
+
+def board_cycle(cols, rows):
+    if cols < 2 or rows < 2:
+        raise ValueError(f"a {cols}x{rows} board has no Hamiltonian cycle")
+    if cols * rows < MIN_BOARD_CELLS:
+        raise ValueError(f"a {cols}x{rows} board is too small for the autopilot")
+    # hamiltonian_cycle sweeps rows, so transpose boards with odd rows
+    if rows % 2 == 0:
+        return engine.hamiltonian_cycle(cols, rows)
+    if cols % 2 == 0:
+        return [(x, y) for y, x in engine.hamiltonian_cycle(rows, cols)]
+    raise ValueError(f"a {cols}x{rows} board has no Hamiltonian cycle")
+
+class Autopilot:
+    def __init__(self, cols=engine.GRID_COLS, rows=engine.GRID_ROWS):
+        self.cols = cols
+        self.rows = rows
+        self.size = cols * rows
+        cycle = [y * cols + x for x, y in board_cycle(cols, rows)]
+
+        # Position of each cell along the cycle, and the cell after it
+        self.order = array("I", bytes(4 * self.size))
+        self.successor = array("I", bytes(4 * self.size))
+        for position, cell in enumerate(cycle):
+            self.order[cell] = position
+            self.successor[cell] = cycle[(position + 1) % self.size]
+
+        # Direction of a step by its change in cell index; neighbours are
+        # found on the fly, as per-cell tables cost too much on huge boards
+        self.direction_of = {dy * cols + dx: direction for direction, (dx, dy) in DIRECTIONS.items()}
+
+        # Time spent in choose(), for reporting
+        self.decisions = 0
+        self.decision_time = 0.0
+        self.worst_decision = 0.0
+
+    def distance(self, a, b):
+        # Steps from cell a forward along the cycle to cell b
+        return (self.order[b] - self.order[a]) % self.size
+
+    def choose(self, world):
+        """Direction for the world's next step."""
+        start = time.perf_counter()
+        direction = self.decide(world)
+        elapsed = time.perf_counter() - start
+        self.decisions += 1
+        self.decision_time += elapsed
+        if elapsed > self.worst_decision:
+            self.worst_decision = elapsed
+        return direction
+
+    def decide(self, world):
+        snake = world.snake
+        cols, rows = self.cols, self.rows
+        occupied = snake.grid.occupied
+        head = snake.head[1] * cols + snake.head[0]
+        tail = snake.body[-1][1] * cols + snake.body[-1][0]
+        food = world.food.position[1] * cols + world.food.position[0]
+        food_x, food_y = world.food.position
+        to_food = self.distance(head, food)
+        ahead = self.distance(head, tail) or self.size  # Free stretch before the tail
+        backwards = OPPOSITE[snake.direction]
+        # Shortcuts only while the snake covers less than half the board
+        shortcuts = len(snake.body) < self.size // 2
+
+        best = None
+        best_key = None
+        fallback = None
+        fallback_room = -1
+        head_x, head_y = snake.head
+        for direction, (dx, dy) in DIRECTIONS.items():
+            x, y = head_x + dx, head_y + dy
+            if direction == backwards or not (0 <= x < cols and 0 <= y < rows):
+                continue
+            cell = y * cols + x
+            if occupied[cell] and not (cell == tail and snake.growth_pending == 0):
+                continue
+
+            # Free cells left ahead along the cycle after moving here; cells
+            # behind the head (gaps left by earlier shortcuts) would break
+            # the body order, so they count as having no room
+            jump = self.distance(head, cell)
+            room = ahead - jump
+            growth = snake.growth_pending + (1 if cell == food else 0)
+            if room <= len(snake.body) + growth + SAFETY_MARGIN:
+                if room > fallback_room:
+                    fallback, fallback_room = direction, room
+                continue
+            if room > fallback_room:
+                fallback, fallback_room = direction, room
+
+            # Shortcuts must not overshoot the food along the cycle
+            if not shortcuts or jump > to_food:
+                continue
+            key = (
+                abs(cell % cols - food_x) + abs(cell // cols - food_y),
+                self.distance(cell, food),
+            )
+            if best_key is None or key < best_key:
+                best, best_key = direction, key
+
+        if best is not None:
+            return best
+
+        # No safe shortcut: follow the cycle, which the body order keeps free
+        successor = self.successor[head]
+        direction = self.direction_of[successor - head]
+        if direction != backwards and (not occupied[successor] or successor == tail):
+            return direction
+        return fallback if fallback is not None else snake.direction
+
+    def average_decision_us(self):
+        return self.decision_time / max(self.decisions, 1) * 1e6
+
+def play(world, autopilot, max_ticks=None):
+    """Run world to the end of its game under autopilot; returns world."""
+    while world.alive and (max_ticks is None or world.ticks < max_ticks):
+        world.step(autopilot.choose(world))
+    return world
+
+def main():
+    parser = argparse.ArgumentParser(description="Play headless games with the autopilot")
+    parser.add_argument("--games", type=int, default=1, help="games to play")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--cols", type=int, default=engine.GRID_COLS)
+    parser.add_argument("--rows", type=int, default=engine.GRID_ROWS)
+    parser.add_argument("--max-ticks", type=int, help="stop each game after this many ticks")
+    args = parser.parse_args()
+    if not (1 <= args.cols <= engine.MAX_BOARD_SIDE and 1 <= args.rows <= engine.MAX_BOARD_SIDE):
+        parser.error(f"board size out of range: {args.cols}x{args.rows}")
+    try:
+        board_cycle(args.cols, args.rows)
+    except ValueError as e:
+        parser.error(str(e))
+
+    autopilot = Autopilot(args.cols, args.rows)
+    world = engine.World(args.cols, args.rows, seed=args.seed)
+    wins = 0
+    for game in range(args.games):
+        world.reset(args.seed + game)
+        start = time.perf_counter()
+        play(world, autopilot, args.max_ticks)
+        elapsed = time.perf_counter() - start
+        wins += world.won
+        result = "cleared the board" if world.won else ("died" if not world.alive else "stopped")
+        print(f"seed {world.seed}: {result} after {world.ticks} ticks, length {len(world.snake.body)}/"
+              f"{args.cols * args.rows} ({world.ticks / max(elapsed, 1e-9):,.0f} ticks/s)")
+    print(f"{wins}/{args.games} boards cleared; decisions avg {autopilot.average_decision_us():.1f} us, "
+          f"worst {autopilot.worst_decision * 1e6:.0f} us")
+    return 0 if wins == args.games else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,153 @@
+"""Vectorized stepper that advances many independent boards in lockstep.
+
+Each board follows the same rules as engine.World, but all state lives in
+NumPy arrays so one step() call moves every snake at once. Intended for
+bot training and balance testing, where thousands of games are needed.
+"""
+import numpy as np
+
+from engine import DIRECTION_NAMES, GRID_COLS, GRID_ROWS
+
+# Direction codes, ordered so that the opposite of d is (d + 2) % 4
+RIGHT, DOWN, LEFT, UP = 0, 1, 2, 3
+DIRECTION_CODES = {name: code for code, name in enumerate(DIRECTION_NAMES)}
+DX = np.array([1, 0, -1, 0], dtype=np.int32)
+DY = np.array([0, 1, 0, -1], dtype=np.int32)
+
+# Random food draws tried per step before falling back to a free-cell scan
+FOOD_ATTEMPTS = 8
+
+class BatchWorld:
+    def __init__(self, count, cols=GRID_COLS, rows=GRID_ROWS, seed=None, auto_reset=True):
+        self.count = count
+        self.cols = cols
+        self.rows = rows
+        self.size = cols * rows
+        self.auto_reset = auto_reset
+        self.rng = np.random.default_rng(seed)
+
+        # Per-board state
+        self.heads = np.zeros(count, dtype=np.int32)  # Head cell index
+        self.directions = np.zeros(count, dtype=np.int8)
+        self.lengths = np.zeros(count, dtype=np.int32)  # Cells in the body
+        self.growth_pending = np.zeros(count, dtype=np.int32)
+        self.scores = np.zeros(count, dtype=np.int32)
+        self.ticks = np.zeros(count, dtype=np.int64)
+        self.food = np.zeros(count, dtype=np.int32)
+        self.alive = np.zeros(count, dtype=bool)
+        self.won = np.zeros(count, dtype=bool)
+        self.occupied = np.zeros((count, self.size), dtype=bool)
+
+        # Bodies as ring buffers of cell indices, one row per board
+        self.capacity = self.size + 1
+        self.body = np.zeros((count, self.capacity), dtype=np.int32)
+        self.head_ptr = np.zeros(count, dtype=np.int64)
+        self.tail_ptr = np.zeros(count, dtype=np.int64)
+
+        # Totals over finished games, for quick throughput/balance stats
+        self.games_finished = 0
+        self.total_ticks = 0
+
+        self.reset()
+
+    def reset(self, mask=None):
+        boards = np.arange(self.count) if mask is None else np.flatnonzero(mask)
+        if boards.size == 0:
+            return
+
+        start = (self.rows // 2) * self.cols + self.cols // 2
+        self.heads[boards] = start
+        self.directions[boards] = RIGHT
+        self.lengths[boards] = 1
+        self.growth_pending[boards] = 0
+        self.scores[boards] = 0
+        self.ticks[boards] = 0
+        self.alive[boards] = True
+        self.won[boards] = False
+        self.occupied[boards] = False
+        self.occupied[boards, start] = True
+        self.head_ptr[boards] = 0
+        self.tail_ptr[boards] = 0
+        self.body[boards, 0] = start
+        self.place_food(boards)
+
+    def place_food(self, boards):
+        # Rejection-sample a few times for every board at once; boards that
+        # are still unlucky (nearly full) scan their free cells directly
+        pending = boards
+        for _ in range(FOOD_ATTEMPTS):
+            if pending.size == 0:
+                return
+            cells = self.rng.integers(0, self.size, pending.size, dtype=np.int32)
+            free = ~self.occupied[pending, cells]
+            self.food[pending[free]] = cells[free]
+            pending = pending[~free]
+
+        for board in pending:
+            free_cells = np.flatnonzero(~self.occupied[board])
+            if free_cells.size == 0:
+                # Board is full: the snake has won
+                self.won[board] = True
+                self.alive[board] = False
+                self.food[board] = -1
+            else:
+                self.food[board] = free_cells[self.rng.integers(free_cells.size)]
+
+    def step(self, actions=None):
+        """Advance every live board by one move.
+
+        actions is an optional array of direction codes (-1 keeps the
+        current heading). Returns (ate, died) boolean arrays.
+        """
+        alive = self.alive.copy()
+        boards = np.arange(self.count)
+
+        # Apply turns, ignoring 180-degree reversals
+        if actions is not None:
+            actions = np.asarray(actions)
+            turn = alive & (actions >= 0) & (actions != (self.directions + 2) % 4)
+            self.directions[turn] = actions[turn]
+
+        # New head position and wall check
+        x = self.heads % self.cols + DX[self.directions]
+        y = self.heads // self.cols + DY[self.directions]
+        wall = (x < 0) | (x >= self.cols) | (y < 0) | (y >= self.rows)
+        new_heads = np.where(wall, 0, y * self.cols + x).astype(np.int32)
+
+        # Release tails first so the head may enter the cell being vacated
+        growing = alive & (self.growth_pending > 0)
+        self.growth_pending[growing] -= 1
+        popping = alive & ~growing
+        tails = self.body[popping, self.tail_ptr[popping]]
+        self.occupied[popping, tails] = False
+        self.tail_ptr[popping] = (self.tail_ptr[popping] + 1) % self.capacity
+        self.lengths[growing] += 1
+
+        # Self collision against the occupancy grid
+        hit = self.occupied[boards, new_heads] & ~wall
+        died = alive & (wall | hit)
+        moved = alive & ~died
+
+        # Place the new heads
+        self.head_ptr[moved] = (self.head_ptr[moved] + 1) % self.capacity
+        self.body[moved, self.head_ptr[moved]] = new_heads[moved]
+        self.occupied[moved, new_heads[moved]] = True
+        self.heads[moved] = new_heads[moved]
+        self.ticks[alive] += 1
+
+        # Eating schedules growth for the next move and respawns the food
+        ate = moved & (new_heads == self.food)
+        self.growth_pending[ate] += 1
+        self.scores[ate] += 10
+        if ate.any():
+            self.place_food(np.flatnonzero(ate))
+
+        self.alive &= ~died
+        finished = alive & ~self.alive
+        if finished.any():
+            self.games_finished += int(finished.sum())
+            self.total_ticks += int(self.ticks[finished].sum())
+            if self.auto_reset:
+                self.reset(finished)
+
+        return ate, died
@@ -0,0 +1,331 @@
+"""Headless benchmarks for the simulation and render hot paths.
+
+Runs under SDL's dummy video driver, so no window opens. Covers snake
+movement, collision checks and food placement at lengths from 1 to a full
+board, snake drawing with and without the grow effect, scrolling-view
+drawing on a large world, arena ticks with many snakes, the particle
+system at several particle counts, and cold start to the first menu frame
+(each launch is a fresh `game.py --startup-time` process, run in a
+temporary directory so its caches stay out of the tree). The whole suite
+runs several rounds, and each benchmark keeps its best round along with
+the spread between rounds, and a fixed reference loop is timed next to
+every benchmark, so a machine that is busy or throttled for a while
+doesn't skew the numbers. Results are written as JSON and can be compared
+against a stored baseline, each benchmark relative to its reference and
+allowing for the spread of both runs:
+
+    python benchmark.py --output bench.json
+    python benchmark.py --baseline bench.json
+"""
+import os
+
+# Must be set before pygame is imported, and inherited by startup runs
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import pygame
+
+import engine
+import game
+from arena import Arena
+from particles import ParticleSystem
+
+PARTICLE_COUNTS = (0, 30, 300, 1000)
+LARGE_WORLD = (500, 500)
+LARGE_WORLD_LENGTHS = (10, 1000, 100000)
+ARENA_SNAKES = (10, 100, 1000)
+ARENA_SIZE = (200, 200)
+ROUNDS = 5  # Passes over the whole suite; each benchmark keeps its best
+SPREAD_FACTOR = 1  # A drop must exceed this many spreads to count as a regression
+REFERENCE_LOOPS = 20000  # Size of the reference workload timed around each benchmark
+
+def snake_lengths(size):
+    return sorted({1, 10, 100, size // 2, size - 1, size})
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def reference_rate():
+    # A fixed pure-Python workload: whatever slows it down (a throttled
+    # CPU, a noisy neighbour) slows the benchmark next to it too
+    start = time.perf_counter()
+    total = 0
+    for i in range(REFERENCE_LOOPS):
+        total += i * i
+    return REFERENCE_LOOPS / (time.perf_counter() - start)
+
+def with_reference(measure):
+    # Time the reference on both sides of a measurement and keep the
+    # slower one, since that is what the benchmark ran alongside
+    def measured(func, count):
+        before = reference_rate()
+        result = measure(func, count)
+        result["reference_ops_per_sec"] = min(before, reference_rate())
+        return result
+    return measured
+
+@with_reference
+def measure_ops(func, iterations):
+    # Plain throughput for cheap operations
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    return {"ops_per_sec": iterations / elapsed}
+
+@with_reference
+def measure_frames(func, frames):
+    # Per-call timings for frame-sized work, reported as percentiles
+    timings = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "ops_per_sec": len(timings) / sum(timings),
+        "p50_ms": percentile(timings, 0.50) * 1000,
+        "p95_ms": percentile(timings, 0.95) * 1000,
+        "p99_ms": percentile(timings, 0.99) * 1000,
+    }
+
+def relative_rate(result):
+    # Benchmark rate per unit of reference rate; falls back to the raw
+    # rate for results recorded without a reference
+    return result["ops_per_sec"] / result.get("reference_ops_per_sec", 1.0)
+
+def best_of(rounds):
+    # Each benchmark's fastest round relative to its reference, plus the
+    # spread across rounds relative to that best; slowdowns only ever
+    # come from outside interference, so the best round is the closest
+    # to the code's own cost
+    results = {}
+    for name in rounds[0]:
+        runs = [results_round[name] for results_round in rounds]
+        rates = [relative_rate(run) for run in runs]
+        best = max(runs, key=relative_rate)
+        results[name] = dict(best, spread=(max(rates) - min(rates)) / max(rates), rounds=len(runs))
+    return results
+
+class CycleDriver:
+    """Lays a snake of a given length along a Hamiltonian cycle and keeps
+    it moving along that cycle, so it never dies however long it runs."""
+
+    def __init__(self, cols, rows):
+        self.cycle = engine.hamiltonian_cycle(cols, rows)
+        self.turn_at = {}
+        for here, there in zip(self.cycle, self.cycle[1:] + self.cycle[:1]):
+            delta = (there[0] - here[0], there[1] - here[1])
+            self.turn_at[here] = next(d for d, step in engine.DIRECTIONS.items() if step == delta)
+
+    def place(self, snake, length):
+        snake.reset(*self.cycle[length - 1])
+        for x, y in self.cycle[length - 2::-1] if length > 1 else ():
+            snake.body.append([x, y])
+            snake.grid.occupy(snake.grid.index(x, y))
+        previous = self.cycle[length - 2] if length > 1 else self.cycle[-1]
+        snake.direction = self.turn_at[previous]
+
+    def step(self, snake):
+        snake.change_direction(self.turn_at[tuple(snake.head)])
+        snake.move()
+
+def bench_simulation(results, lengths, iterations):
+    cols, rows = engine.GRID_COLS, engine.GRID_ROWS
+    driver = CycleDriver(cols, rows)
+    snake = engine.Snake(0, 0, cols, rows)
+    food = engine.Food(cols, rows)
+
+    for length in lengths:
+        driver.place(snake, length)
+        results[f"snake.move[len={length}]"] = measure_ops(lambda: driver.step(snake), iterations)
+        results[f"snake.check_collision[len={length}]"] = measure_ops(snake.check_collision, iterations)
+        driver.place(snake, length)
+        results[f"food.reposition[len={length}]"] = measure_ops(lambda: food.reposition(snake.grid), iterations)
+
+def bench_snake_draw(results, lengths, frames):
+    driver = CycleDriver(game.GRID_COLS, game.GRID_ROWS)
+    snake = game.Snake(0, 0)
+    surface = pygame.Surface((game.WIDTH, game.HEIGHT))
+
+    for length in lengths:
+        driver.place(snake, length)
+        snake.refresh_segments()
+
+        def draw_static():
+            snake.draw(surface, 0.5)
+
+        def draw_growing():
+            # Hold the effect part way through so it stays active
+            snake.grow_effect_active = True
+            snake.grow_effect_timer = snake.grow_effect_duration // 2
+            snake.draw(surface, 0.5)
+
+        snake.grow_effect_active = False
+        results[f"snake.draw[len={length}]"] = measure_frames(draw_static, frames)
+        results[f"snake.draw[len={length},grow]"] = measure_frames(draw_growing, frames)
+        snake.grow_effect_active = False
+
+def bench_large_world(results, frames):
+    # Scrolling view of a big board: cost should follow the visible area,
+    # not the snake length, and moves and food placement stay O(1)
+    cols, rows = LARGE_WORLD
+    driver = CycleDriver(cols, rows)
+    snake = game.Snake(0, 0, cols=cols, rows=rows)
+    food = engine.Food(cols, rows)
+    camera = game.Camera(game.WIDTH, game.HEIGHT, cols * game.BLOCK_SIZE, rows * game.BLOCK_SIZE)
+    surface = pygame.Surface((game.WIDTH, game.HEIGHT))
+    world = f"world={cols}x{rows}"
+
+    for length in LARGE_WORLD_LENGTHS:
+        driver.place(snake, length)
+        snake.refresh_segments()
+
+        def frame():
+            driver.step(snake)
+            x, y = snake.lerp_cell(snake.get_previous_head(), snake.head, 0.5)
+            camera.follow(x, y)
+            snake.draw_visible(surface, camera, 0.5)
+
+        results[f"snake.draw_visible[{world},len={length}]"] = measure_frames(frame, frames)
+        results[f"food.reposition[{world},len={length}]"] = measure_ops(lambda: food.reposition(snake.grid), frames)
+
+def bench_arena(results, frames):
+    # A tick should cost in proportion to the number of snakes, whatever
+    # their lengths; compare ops/sec times snakes across counts
+    cols, rows = ARENA_SIZE
+    for count in ARENA_SNAKES:
+        arena = Arena(cols, rows, count, seed=0)
+        for _ in range(100):
+            arena.step()  # Let the snakes grow out first
+        results[f"arena.step[snakes={count}]"] = measure_frames(arena.step, frames)
+
+def bench_particles(results, frames):
+    surface = pygame.Surface((game.WIDTH, game.HEIGHT))
+    for count in PARTICLE_COUNTS:
+        particles = ParticleSystem(capacity=max(count, 1))
+        particles.reseed(0)
+
+        def frame():
+            # Top the pool back up so the live count stays fixed
+            if len(particles) < count:
+                particles.emit(game.WIDTH / 2, game.HEIGHT / 2, game.GOLD, count - len(particles))
+            particles.update()
+            particles.draw(surface)
+
+        results[f"particles.frame[count={count}]"] = measure_frames(frame, frames)
+
+def bench_startup(results, launches):
+    # The game writes its leaderboard and font cache to the working
+    # directory, so launches run in a scratch one (sounds load only after
+    # the first frame, so their relative paths don't matter here)
+    script = os.path.join(os.path.dirname(os.path.abspath(game.__file__)), "game.py")
+    with tempfile.TemporaryDirectory(prefix="snake-bench-") as work_dir:
+        def launch():
+            subprocess.run(
+                [sys.executable, script, "--startup-time"], cwd=work_dir, check=True,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+
+        launch()  # Warm the OS file cache and the font cache
+        results["startup.first_menu_frame"] = measure_frames(launch, launches)
+
+def run(quick=False, rounds=ROUNDS):
+    iterations = 2000 if quick else 20000
+    frames = 50 if quick else 300
+    lengths = snake_lengths(engine.GRID_COLS * engine.GRID_ROWS)
+
+    # Whole passes rather than back-to-back repeats of each benchmark, so
+    # a busy stretch on the machine lands in one round of many benchmarks
+    # instead of every round of a few
+    passes = []
+    for _ in range(rounds):
+        results = {}
+        bench_simulation(results, lengths, iterations)
+        bench_snake_draw(results, lengths, frames)
+        bench_large_world(results, frames)
+        bench_arena(results, frames)
+        bench_particles(results, frames)
+        bench_startup(results, 3 if quick else 10)
+        passes.append(results)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "quick": quick,
+            "rounds": rounds,
+        },
+        "results": best_of(passes),
+    }
+
+def compare(report, baseline, tolerance):
+    """Print the best-round ops/sec ratio, relative to the reference, for
+    every shared benchmark; return regressions.
+
+    A benchmark regresses when it drops by more than tolerance and by more
+    than SPREAD_FACTOR times the larger spread between rounds of the two
+    runs, so noisy benchmarks need a bigger drop to be flagged.
+    """
+    regressions = []
+    for name, current in report["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        ratio = relative_rate(current) / relative_rate(previous)
+        spread = max(current.get("spread", 0.0), previous.get("spread", 0.0))
+        allowed = max(tolerance, SPREAD_FACTOR * spread)
+        flag = ""
+        if ratio < 1 - allowed:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:45s} {current['ops_per_sec']:14,.0f} ops/s  x{ratio:5.2f}  (allowed -{allowed:.0%}){flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Ultra Snake 3D hot paths")
+    parser.add_argument("--output", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against a previous results file")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.1,
+        help="smallest ops/sec drop that counts as regressed; noisier "
+             "benchmarks allow more (default 0.1)"
+    )
+    parser.add_argument("--quick", action="store_true", help="fewer iterations, for smoke runs")
+    parser.add_argument("--rounds", type=int, default=ROUNDS, help=f"passes over the suite (default {ROUNDS})")
+    args = parser.parse_args()
+    if args.rounds < 1:
+        parser.error("--rounds must be at least 1")
+
+    report = run(quick=args.quick, rounds=args.rounds)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed beyond their allowed drop")
+            return 1
+    else:
+        for name, result in report["results"].items():
+            line = f"{name:45s} {result['ops_per_sec']:14,.0f} ops/s  ±{result['spread']:4.0%}"
+            if "p50_ms" in result:
+                line += f"  p50 {result['p50_ms']:.3f}  p95 {result['p95_ms']:.3f}  p99 {result['p99_ms']:.3f} ms"
+            print(line)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Scrolling viewport and visibility index for boards bigger than the window.
+
+Camera maps world pixels to screen pixels and clamps itself to the board.
+BucketIndex groups body cells into square buckets so the renderer can
+fetch just the segments inside the viewport; drawing then costs what is
+on screen, however long the snake or large the board.
+"""
+BUCKET_SIZE = 16  # Cells per bucket side
+
+class Camera:
+    def __init__(self, view_width, view_height, world_width, world_height):
+        self.view_width = view_width
+        self.view_height = view_height
+        self.world_width = world_width
+        self.world_height = world_height
+        self.x = 0  # World pixel at the top-left of the view
+        self.y = 0
+
+    def follow(self, x, y):
+        # Centre on a world pixel, without showing past the board edges
+        # (a board smaller than the view is centred instead)
+        self.x = self.clamp(x - self.view_width // 2, self.world_width, self.view_width)
+        self.y = self.clamp(y - self.view_height // 2, self.world_height, self.view_height)
+
+    @staticmethod
+    def clamp(position, world, view):
+        if world <= view:
+            return (world - view) // 2
+        return int(max(0, min(position, world - view)))
+
+    def get_offset(self):
+        # Add to world pixels to get screen pixels
+        return -self.x, -self.y
+
+    def visible_cells(self, block_size, margin=1):
+        # Cell range (x0, y0, x1, y1), end exclusive, covering the view
+        # plus margin cells for sprites that spill over their cell
+        return (
+            self.x // block_size - margin,
+            self.y // block_size - margin,
+            (self.x + self.view_width) // block_size + 1 + margin,
+            (self.y + self.view_height) // block_size + 1 + margin,
+        )
+
+class BucketIndex:
+    """Body cells bucketed by position, kept in step with the snake."""
+
+    def __init__(self, cols, rows, bucket_size=BUCKET_SIZE):
+        self.cols = cols
+        self.rows = rows
+        self.bucket_size = bucket_size
+        self.bucket_cols = -(-cols // bucket_size)
+        self.bucket_rows = -(-rows // bucket_size)
+        self.buckets = [set() for _ in range(self.bucket_cols * self.bucket_rows)]
+
+    def bucket(self, x, y):
+        return self.buckets[(y // self.bucket_size) * self.bucket_cols + x // self.bucket_size]
+
+    def clear(self):
+        for bucket in self.buckets:
+            bucket.clear()
+
+    def add(self, x, y):
+        if 0 <= x < self.cols and 0 <= y < self.rows:
+            self.bucket(x, y).add((x, y))
+
+    def remove(self, x, y):
+        if 0 <= x < self.cols and 0 <= y < self.rows:
+            self.bucket(x, y).discard((x, y))
+
+    def query(self, x0, y0, x1, y1):
+        """Cells inside the range (end exclusive), in no particular order."""
+        size = self.bucket_size
+        bx0, by0 = max(0, x0 // size), max(0, y0 // size)
+        bx1 = min(self.bucket_cols - 1, (x1 - 1) // size)
+        by1 = min(self.bucket_rows - 1, (y1 - 1) // size)
+        for by in range(by0, by1 + 1):
+            row = by * self.bucket_cols
+            for bx in range(bx0, bx1 + 1):
+                bucket = self.buckets[row + bx]
+                if not bucket:
+                    continue
+                # Buckets wholly inside the range need no per-cell check
+                if x0 <= bx * size and (bx + 1) * size <= x1 and y0 <= by * size and (by + 1) * size <= y1:
+                    yield from bucket
+                else:
+                    for x, y in bucket:
+                        if x0 <= x < x1 and y0 <= y < y1:
+                            yield x, y
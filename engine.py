@@ -0,0 +1,340 @@
+"""Pure game rules for Ultra Snake 3D.
+
+Nothing in here imports pygame, so boards can be simulated headlessly
+(bots, balance tests) and game.py only has to draw them. Positions are
+grid cells, not pixels.
+"""
+import argparse
+import math
+import random
+from array import array
+from collections import deque
+
+# Board and speed settings
+GRID_COLS = 40
+GRID_ROWS = 30
+FPS = 15  # Base snake speed (moves per second)
+ACCELERATION = 0.2  # Speed increases as snake grows
+MAX_SPEED = 30
+MAX_BOARD_SIDE = 0x7FFF  # Snapshots store cell coordinates as signed 16-bit values
+INPUT_QUEUE_SIZE = 3  # Turns buffered ahead of the snake; extra presses are dropped
+
+# Grid offsets for each direction
+DIRECTIONS = {
+    "RIGHT": (1, 0),
+    "LEFT": (-1, 0),
+    "UP": (0, -1),
+    "DOWN": (0, 1),
+}
+OPPOSITE = {"RIGHT": "LEFT", "LEFT": "RIGHT", "UP": "DOWN", "DOWN": "UP"}
+# Stable numbering for compact formats; the opposite of code d is (d + 2) % 4
+DIRECTION_NAMES = ("RIGHT", "DOWN", "LEFT", "UP")
+
+# Outcome of a single World.step()
+class StepResult:
+    MOVED = 0
+    ATE = 1
+    DIED = 2
+    WON = 3  # Board is full, nowhere left to put food
+
+class FixedTimestep:
+    """Turns elapsed real time into whole simulation ticks.
+
+    Time is accumulated and consumed one tick interval at a time, so the
+    simulation runs at exactly its tick rate whatever the frame rate. At
+    most max_catch_up ticks run per frame (None for no cap); any backlog
+    past that is dropped rather than replayed.
+    """
+
+    def __init__(self, max_catch_up=5):
+        self.max_catch_up = max_catch_up
+        self.reset()
+
+    def reset(self):
+        self.accumulator = 0.0
+        self.ticks_this_frame = 0
+
+    def advance(self, elapsed_ms):
+        self.accumulator += elapsed_ms
+        self.ticks_this_frame = 0
+
+    def next_tick(self, interval_ms):
+        # Consume one tick if one is due
+        if self.accumulator < interval_ms:
+            return False
+        if self.max_catch_up is not None and self.ticks_this_frame >= self.max_catch_up:
+            self.accumulator %= interval_ms
+            return False
+        self.accumulator -= interval_ms
+        self.ticks_this_frame += 1
+        return True
+
+    def alpha(self, interval_ms):
+        # How far we are between the previous tick and the next, 0..1
+        return min(1.0, self.accumulator / interval_ms)
+
+class Grid:
+    """Occupancy bitmap plus an index of the free cells.
+
+    The free cells are kept in a flat array with a reverse lookup of each
+    cell's slot, so occupying or releasing a cell is a swap-remove/append
+    and a uniformly random free cell can be picked in constant time.
+    """
+
+    def __init__(self, cols, rows):
+        self.cols = cols
+        self.rows = rows
+        self.size = cols * rows
+        self.typecode = "H" if self.size <= 0x10000 else "I"  # Smallest that fits a cell index
+        self.occupied = bytearray(self.size)  # 1 = cell covered by a body
+        self.free = array(self.typecode, range(self.size))
+        self.slot = array(self.typecode, range(self.size))
+
+    def index(self, x, y):
+        # Map a cell to its flat index, or -1 if off the board
+        if 0 <= x < self.cols and 0 <= y < self.rows:
+            return y * self.cols + x
+        return -1
+
+    def occupy(self, index):
+        self.occupied[index] = 1
+        slot = self.slot[index]
+        last = self.free.pop()
+        if last != index:
+            self.free[slot] = last
+            self.slot[last] = slot
+
+    def release(self, index):
+        self.occupied[index] = 0
+        self.slot[index] = len(self.free)
+        self.free.append(index)
+
+    def free_count(self):
+        return len(self.free)
+
+    def random_free(self, rng):
+        # Uniformly random free cell as [x, y], or None if the board is full
+        if not self.free:
+            return None
+        index = self.free[rng.randrange(len(self.free))]
+        return [index % self.cols, index // self.cols]
+
+class Steering:
+    """Turn rules shared by every snake: a direction plus queued turns."""
+
+    def change_direction(self, direction):
+        # Prevent 180-degree turns
+        if direction in DIRECTIONS and self.direction != OPPOSITE[direction]:
+            self.direction = direction
+
+    def queue_direction(self, direction):
+        # Buffer a player turn; it is validated when committed, so quick
+        # presses between moves all count instead of overwriting each other
+        queue = self.input_queue
+        if direction not in DIRECTIONS or len(queue) >= INPUT_QUEUE_SIZE:
+            return
+        if (queue[-1] if queue else self.direction) != direction:
+            queue.append(direction)
+
+    def commit_direction(self):
+        # Apply at most one queued turn per move, checked against the
+        # committed direction; reversals and no-op turns are discarded
+        queue = self.input_queue
+        while queue:
+            direction = queue.popleft()
+            if direction != self.direction and direction != OPPOSITE[self.direction]:
+                self.direction = direction
+                return
+
+class Snake(Steering):
+    def __init__(self, x, y, cols=GRID_COLS, rows=GRID_ROWS, base_speed=FPS, acceleration=ACCELERATION):
+        self.cols = cols
+        self.rows = rows
+        self.base_speed = base_speed  # Moves per second at length 1
+        self.acceleration = acceleration  # Added per segment grown
+        self.reset(x, y)
+
+    def reset(self, x, y):
+        self.head = [x, y]
+        self.body = deque([[x, y]])  # Head on the left, tail on the right
+        self.direction = "RIGHT"
+        self.length = 1
+        self.speed = self.base_speed
+        self.score = 0
+        self.growth_pending = 0
+        self.vacated = None  # Cell the tail left on the last move, if any
+        self.input_queue = deque()  # Player turns not yet committed
+
+        # Cells covered by the body, and the free cells food can use
+        self.grid = Grid(self.cols, self.rows)
+        self.grid.occupy(self.grid.index(x, y))
+        self.hit_self = False
+
+    def move(self):
+        dx, dy = DIRECTIONS[self.direction]
+        x = self.head[0] + dx
+        y = self.head[1] + dy
+        self.head = [x, y]
+
+        # Handle growth or remove tail (before placing the head, so the
+        # head may legally move into the cell the tail is leaving)
+        if self.growth_pending > 0:
+            self.growth_pending -= 1
+            self.vacated = None
+        else:
+            self.vacated = self.body.pop()
+            self.grid.release(self.grid.index(*self.vacated))
+
+        # Add new head position to body and mark its cell
+        self.body.appendleft([x, y])
+        index = self.grid.index(x, y)
+        if index >= 0:
+            self.hit_self = self.grid.occupied[index] == 1
+            if not self.hit_self:
+                self.grid.occupy(index)
+
+    def check_collision(self):
+        # Check for wall collision
+        x, y = self.head
+        if x < 0 or x >= self.cols or y < 0 or y >= self.rows:
+            return True
+
+        # Check for self collision (head landed on an occupied cell)
+        return self.hit_self
+
+    def grow(self):
+        self.length += 1
+        self.growth_pending += 1
+        self.score += 10
+
+        # Increase speed with each growth
+        self.speed = min(self.base_speed + (self.length - 1) * self.acceleration, MAX_SPEED)
+
+class Food:
+    def __init__(self, cols=GRID_COLS, rows=GRID_ROWS, rng=None):
+        self.cols = cols
+        self.rows = rows
+        self.rng = rng if rng is not None else random
+        self.position = self.randomize_position()
+
+    def randomize_position(self):
+        x = self.rng.randint(0, self.cols - 1)
+        y = self.rng.randint(0, self.rows - 1)
+        return [x, y]
+
+    def reposition(self, grid):
+        # Pick a free cell so food never spawns on the snake; returns False
+        # when the board is full
+        new_pos = grid.random_free(self.rng)
+        if new_pos is None:
+            return False
+        self.position = new_pos
+        return True
+
+def parse_board_size(text):
+    """argparse type for a COLSxROWS board size, e.g. 500x500."""
+    try:
+        cols, rows = (int(part) for part in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected COLSxROWS, not {text!r}") from None
+    if not (2 <= cols <= MAX_BOARD_SIDE and 2 <= rows <= MAX_BOARD_SIDE):
+        raise argparse.ArgumentTypeError(f"board size out of range: {text!r}")
+    return cols, rows
+
+def parse_speed(text):
+    """argparse type for a speed (moves per second, or a multiplier)."""
+    try:
+        speed = float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a number, not {text!r}") from None
+    if not 0 < speed < math.inf:
+        raise argparse.ArgumentTypeError(f"speed must be positive: {text!r}")
+    return speed
+
+def parse_acceleration(text):
+    """argparse type for the speed-up per food eaten."""
+    try:
+        acceleration = float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a number, not {text!r}") from None
+    if not 0 <= acceleration < math.inf:
+        raise argparse.ArgumentTypeError(f"acceleration must be finite and not negative: {text!r}")
+    return acceleration
+
+def hamiltonian_cycle(cols, rows):
+    """Cells of a closed path visiting every cell once (rows must be even).
+
+    Rows are swept back and forth over columns 1.., and column 0 is the
+    return lane to the start. A snake following it can never collide.
+    """
+    if rows % 2:
+        raise ValueError("hamiltonian_cycle needs an even number of rows")
+    cycle = []
+    for y in range(rows):
+        xs = range(1, cols) if y % 2 == 0 else range(cols - 1, 0, -1)
+        cycle.extend((x, y) for x in xs)
+    cycle.extend((0, y) for y in range(rows - 1, -1, -1))
+    return cycle
+
+class World:
+    """One snake and one food item on a board, advanced one move per step().
+
+    All randomness comes from a per-game RNG seeded by reset(), and every
+    direction change is logged against its tick in inputs, so a seed plus
+    that log reproduces the whole game. step(direction) turns immediately
+    (bots, replays); step() commits the next turn the player queued.
+    """
+
+    def __init__(self, cols=GRID_COLS, rows=GRID_ROWS, snake=None, food=None, seed=None,
+                 base_speed=FPS, acceleration=ACCELERATION):
+        # base_speed and acceleration only apply to a snake made here
+        self.cols = cols
+        self.rows = rows
+        if snake is None:
+            snake = Snake(cols // 2, rows // 2, cols, rows, base_speed, acceleration)
+        self.snake = snake
+        self.food = food if food is not None else Food(cols, rows)
+        self.rng = random.Random()
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        # A fresh random seed is drawn unless one is given
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.rng.seed(self.seed)
+        self.food.rng = self.rng
+
+        self.snake.reset(self.cols // 2, self.rows // 2)
+        self.food.reposition(self.snake.grid)
+        self.ticks = 0
+        self.alive = True
+        self.won = False
+        self.inputs = []  # (tick, direction) for every committed turn
+        self.last_direction = self.snake.direction
+
+    def step(self, direction=None):
+        if not self.alive:
+            return StepResult.WON if self.won else StepResult.DIED
+
+        if direction is not None:
+            self.snake.change_direction(direction)
+        else:
+            self.snake.commit_direction()
+        if self.snake.direction != self.last_direction:
+            self.inputs.append((self.ticks, self.snake.direction))
+            self.last_direction = self.snake.direction
+        self.snake.move()
+        self.ticks += 1
+
+        if self.snake.check_collision():
+            self.alive = False
+            return StepResult.DIED
+
+        if self.snake.head == self.food.position:
+            self.snake.grow()
+            if not self.food.reposition(self.snake.grid):
+                self.alive = False
+                self.won = True
+                return StepResult.WON
+            return StepResult.ATE
+
+        return StepResult.MOVED
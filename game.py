@@ -1,15 +1,31 @@
 import pygame
+import argparse
+import colorsys
 import random
 import math
 import os
+import struct
+from collections import OrderedDict
+from itertools import islice
 
-# Initialize pygame
-pygame.init()
+import numpy as np
 
-# Game window dimensions
+import engine
+import resources
+import snapshot
+from arena import FOOD, Arena, parse_snake_count
+from autopilot import Autopilot, board_cycle
+from camera import BucketIndex, Camera
+from engine import StepResult
+from highscore import HighScoreStore
+from leaderboard import Leaderboard
+from particles import ParticleSystem
+from profiler import FrameProfiler
+from replay import Playback, Replay
+from resources import FontCache, SoundBank, get_ticks
+
+# Game window dimensions (the window itself opens when a Game is created)
 WIDTH, HEIGHT = 800, 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Ultra Snake 3D")
 
 # Colors
 BLACK = (0, 0, 0)
@@ -23,35 +39,32 @@ LIGHT_GREEN = (144, 238, 144)
 
 # Game settings
 BLOCK_SIZE = 20
-FPS = 15  # Base snake speed
-ACCELERATION = 0.2  # Speed increases as snake grows
+GRID_COLS = WIDTH // BLOCK_SIZE
+GRID_ROWS = HEIGHT // BLOCK_SIZE
+MAX_CATCH_UP_TICKS = 5  # Simulation ticks allowed per frame after a stall
+TRACE_PATH = "snake_trace.json"  # Where F4 saves a profiler trace
+QUICKSAVE_PATH = "quicksave.snks"  # F5 saves here, F9 loads
+REWIND_HISTORY_TICKS = 300  # Ticks of history kept for rewinding
+REWIND_STEP_TICKS = 15  # Ticks undone per BACKSPACE press
+GROW_FALLOFF = 0.15  # Grow effect lost per segment away from the head
+LAYER_MIN_SEGMENTS = 300  # Shorter snakes blit their segments directly instead of the layer
+LAYER_COLORKEY = (255, 0, 255)  # Transparent in the body layer; never used by the sprites
+MENU_FPS = 20  # The menu only has slow animations
+IDLE_REDRAW_MS = 1000  # Longest sleep while paused or on game over
+ARENA_TICK_MS = 1000 / engine.FPS  # Arena snakes all move at the base speed
 
-# Fonts
-try:
-    title_font = pygame.font.SysFont("arialblack", 50)
-    score_font = pygame.font.SysFont("comicsansms", 25)
-    menu_font = pygame.font.SysFont("arial", 30)
-except:
-    # Fallback to default font if specific fonts not available
-    title_font = pygame.font.Font(None, 60)
-    score_font = pygame.font.Font(None, 32)
-    menu_font = pygame.font.Font(None, 36)
+# Fonts, loaded on first use: system name, size, fallback size
+fonts = FontCache({
+    "title": ("arialblack", 50, 60),
+    "score": ("comicsansms", 25, 32),
+    "menu": ("arial", 30, 36),
+})
 
-# Sound effects setup
-# Sound effects setup
-try:
-    # Initialize the mixer
-    pygame.mixer.init()
-    
-    # Load sounds from the assets folder
-    eat_sound = pygame.mixer.Sound("assets/eat.wav")
-    crash_sound = pygame.mixer.Sound("assets/crash.wav")
-    
-    sounds_loaded = True
-    print("Sound effects loaded successfully.")
-except Exception as e:
-    print(f"Could not load sound effects. Error: {e}")
-    sounds_loaded = False
+# Sound effects, loaded in the background once the menu is showing
+SOUND_PATHS = {
+    "eat": "assets/eat.wav",
+    "crash": "assets/crash.wav",
+}
 
 # Game state
 class GameState:
@@ -60,26 +73,43 @@ class GameState:
     GAME_OVER = 2
     PAUSED = 3
 
-class Snake:
-    def __init__(self, x, y):
-        self.head = [x, y]
-        self.body = [[x, y]]
-        self.direction = "RIGHT"
-        self.length = 1
-        self.turns = {}  # Store turning points
-        self.speed = FPS
-        self.score = 0
-        self.high_score = self.load_high_score()
-        self.ticks_since_last_move = 0
-        self.growth_pending = 0  # For smoother growth animation
-        
-        # Snake size effects
-        self.segment_sizes = {}  # Track size of each segment (index: size)
-        for i in range(len(self.body)):
-            self.segment_sizes[i] = BLOCK_SIZE
-            
-        self.grow_effect_active = False
-        self.grow_effect_timer = 0
+class SurfaceCache:
+    """Bounded LRU cache of prebuilt surfaces, keyed by whatever shapes them."""
+    
+    def __init__(self, capacity=128):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key, build):
+        # Return the cached surface for key, calling build() on a miss
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        
+        self.misses += 1
+        surface = build()
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+    
+    def clear(self):
+        self.surfaces.clear()
+
+class Snake(engine.Snake):
+    """Renders an engine snake; positions are grid cells."""
+    
+    def __init__(self, x, y, high_scores=None, cols=GRID_COLS, rows=GRID_ROWS):
+        super().__init__(x, y, cols, rows)
+        # Writes happen on a background thread, never on the frame path
+        self.high_scores = high_scores if high_scores is not None else HighScoreStore()
+        self.high_score = self.high_scores.load()
+        self.track_high_score = True  # Off for games the player isn't playing
+        
         self.grow_effect_duration = 20  # Duration of growth effect in frames
         self.max_grow_size = BLOCK_SIZE * 1.5  # Maximum size during growth
         
@@ -92,6 +122,29 @@ class Snake:
         self.head_left = pygame.transform.flip(self.head_surface, True, False)
         self.head_up = pygame.transform.rotate(self.head_surface, 90)
         self.head_down = pygame.transform.rotate(self.head_surface, -90)
+        
+        # Scaled segment sprites with their glow, reused by the grow effect
+        self.sprite_cache = SurfaceCache(128)
+        
+        # Every body segment except the head, kept up to date move by move:
+        # a persistent layer when the board is the window, otherwise (a
+        # board-sized surface may not fit in memory) a bucket index the
+        # camera view queries for the segments on screen
+        if self.uses_camera():
+            self.layer = None
+            self.index = BucketIndex(cols, rows)
+        else:
+            # Body sprites are fully opaque or fully clear, so a colorkey
+            # surface in display format blits the same at half the cost
+            self.layer = pygame.Surface((cols * BLOCK_SIZE, rows * BLOCK_SIZE))
+            self.layer.set_colorkey(LAYER_COLORKEY)
+            self.index = None
+        self.refresh_segments()
+    
+    def uses_camera(self):
+        # Boards that don't exactly fill the window are shown through a
+        # camera: bigger ones scroll, smaller ones are centred and outlined
+        return self.grid.cols * BLOCK_SIZE != WIDTH or self.grid.rows * BLOCK_SIZE != HEIGHT
     
     def create_snake_head(self):
         """Create a detailed snake head surface"""
@@ -165,79 +218,16 @@ class Snake:
         
         return surface
     
-    def load_high_score(self):
-        try:
-            with open("highscore.txt", "r") as f:
-                return int(f.read())
-        except (FileNotFoundError, ValueError):
-            return 0
-    
-    def save_high_score(self):
-        with open("highscore.txt", "w") as f:
-            f.write(str(self.high_score))
-    
     def reset(self, x, y):
-        self.head = [x, y]
-        self.body = [[x, y]]
-        self.direction = "RIGHT"
-        self.length = 1
-        self.turns = {}
-        self.speed = FPS
-        self.score = 0
-        self.ticks_since_last_move = 0
-        self.growth_pending = 0
-        self.segment_sizes = {0: BLOCK_SIZE}
+        super().reset(x, y)
         self.grow_effect_active = False
         self.grow_effect_timer = 0
+        if hasattr(self, "layer"):
+            self.refresh_segments()
     
     def move(self):
-        # Update position based on direction
-        x, y = self.head
-        
-        if self.direction == "RIGHT":
-            x += BLOCK_SIZE
-        elif self.direction == "LEFT":
-            x -= BLOCK_SIZE
-        elif self.direction == "UP":
-            y -= BLOCK_SIZE
-        elif self.direction == "DOWN":
-            y += BLOCK_SIZE
-        
-        # Update head position
-        self.head = [x, y]
-        
-        # Store the current turn for body segments to follow
-        self.turns[tuple(self.head)] = self.direction
-        
-        # Add new head position to body
-        self.body.insert(0, [x, y])
-        
-        # Update segment sizes dictionary for the new head
-        new_segment_sizes = {0: self.segment_sizes.get(0, BLOCK_SIZE)}
-        for i in range(1, len(self.body)):
-            new_segment_sizes[i] = self.segment_sizes.get(i-1, BLOCK_SIZE)
-        self.segment_sizes = new_segment_sizes
-        
-        # Handle growth or remove tail
-        if self.growth_pending > 0:
-            self.growth_pending -= 1
-        else:
-            self.body.pop()
-            # Adjust segment_sizes when removing tail
-            max_idx = max(self.segment_sizes.keys())
-            if max_idx >= len(self.body):
-                del self.segment_sizes[max_idx]
-        
-        # Update body segments based on turns
-        i = 1
-        while i < len(self.body):
-            p = tuple(self.body[i])
-            if p in self.turns:
-                # Body segments follow the turning points
-                if i == len(self.body) - 1:
-                    # We can remove this turn point once the tail has passed
-                    del self.turns[p]
-            i += 1
+        super().move()
+        self.update_segments()
         
         # Update grow effect
         if self.grow_effect_active:
@@ -245,110 +235,261 @@ class Snake:
             if self.grow_effect_timer <= 0:
                 self.grow_effect_active = False
     
-    def change_direction(self, direction):
-        # Prevent 180-degree turns
-        if (direction == "RIGHT" and self.direction != "LEFT" or
-            direction == "LEFT" and self.direction != "RIGHT" or
-            direction == "UP" and self.direction != "DOWN" or
-            direction == "DOWN" and self.direction != "UP"):
-            self.direction = direction
-    
-    def check_collision(self):
-        # Check for wall collision
-        if (self.head[0] < 0 or self.head[0] >= WIDTH or 
-            self.head[1] < 0 or self.head[1] >= HEIGHT):
-            return True
-        
-        # Check for self collision (skip head)
-        for segment in self.body[1:]:
-            if segment == self.head:
-                return True
-        
-        return False
-    
     def grow(self):
-        self.length += 1
-        self.growth_pending += 1
-        self.score += 10
-        if self.score > self.high_score:
+        super().grow()
+        if self.track_high_score and self.score > self.high_score:
             self.high_score = self.score
-            self.save_high_score()
-        
-        # Increase speed with each growth
-        self.speed = min(FPS + (self.length - 1) * ACCELERATION, 30)  # Cap at 30 FPS
+            self.high_scores.save(self.high_score)
         
         # Activate grow effect for the entire snake
         self.grow_effect_active = True
         self.grow_effect_timer = self.grow_effect_duration
     
-    def get_segment_size(self, segment_index):
+    def get_growth_factor(self):
+        # Grow effect strength, from 1 just after eating down to 0
+        if not self.grow_effect_active:
+            return 0
+        progress = self.grow_effect_timer / self.grow_effect_duration
+        # Higher at the beginning and lower towards the end
+        return math.sin(progress * math.pi/2)
+    
+    def get_segment_size(self, segment_index, growth_factor=None):
         # Calculate segment size based on grow effect
-        base_size = BLOCK_SIZE
+        if growth_factor is None:
+            growth_factor = self.get_growth_factor()
+        
+        # Apply growth factor with distance falloff (head grows most)
+        distance_factor = max(0, 1 - segment_index * GROW_FALLOFF)
+        size_increase = (self.max_grow_size - BLOCK_SIZE) * growth_factor * distance_factor
+        return BLOCK_SIZE + size_increase
+    
+    def get_head_image(self):
+        # Choose the appropriate directional image for head
+        if self.direction == "RIGHT":
+            return self.head_right
+        elif self.direction == "LEFT":
+            return self.head_left
+        elif self.direction == "UP":
+            return self.head_up
+        else:  # DOWN
+            return self.head_down
+    
+    def create_grow_sprite(self, image, size, alpha):
+        """Scale a segment image and bake its glow on top, centred"""
+        glow_size = int(size * 1.2)
+        surface = pygame.Surface((glow_size, glow_size), pygame.SRCALPHA)
+        
+        scaled_img = pygame.transform.scale(image, (size, size))
+        offset = (glow_size - size) // 2
+        surface.blit(scaled_img, (offset, offset))
+        
+        glow_surface = pygame.Surface((glow_size, glow_size), pygame.SRCALPHA)
+        pygame.draw.circle(
+            glow_surface, 
+            (0, 255, 0, alpha), 
+            (glow_size // 2, glow_size // 2), 
+            glow_size // 2
+        )
+        surface.blit(glow_surface, (0, 0))
+        return surface
+    
+    def refresh_segments(self):
+        # Rebuild the layer or index, for when the body jumped (reset or
+        # restored snapshot)
+        if self.index is not None:
+            self.index.clear()
+            for x, y in islice(self.body, 1, None):
+                self.index.add(x, y)
+            return
+        self.layer.fill(LAYER_COLORKEY)
+        for x, y in islice(self.body, 1, None):
+            self.layer.blit(self.body_surface, (x * BLOCK_SIZE, y * BLOCK_SIZE))
+    
+    def update_segments(self):
+        # Only the ends of the snake change on a move: erase the cell the
+        # tail left and repaint the old head (now the neck) as body
+        if self.index is not None:
+            if self.vacated is not None:
+                self.index.remove(*self.vacated)
+            if len(self.body) > 1:
+                self.index.add(*self.body[1])
+            return
+        if self.vacated is not None:
+            tail_x, tail_y = self.vacated
+            self.layer.fill(
+                LAYER_COLORKEY, 
+                (tail_x * BLOCK_SIZE, tail_y * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE)
+            )
+        if len(self.body) > 1:
+            neck_x, neck_y = self.body[1]
+            self.layer.blit(self.body_surface, (neck_x * BLOCK_SIZE, neck_y * BLOCK_SIZE))
+    
+    def get_previous_head(self):
+        # Where the head was before the last move
+        if len(self.body) > 1:
+            return self.body[1]
+        return self.vacated if self.vacated is not None else self.head
+    
+    def lerp_cell(self, start, end, interpolation):
+        # Pixel position part way from one cell to the next
+        return (
+            (start[0] + (end[0] - start[0]) * interpolation) * BLOCK_SIZE,
+            (start[1] + (end[1] - start[1]) * interpolation) * BLOCK_SIZE
+        )
+    
+    def draw_head(self, surface, interpolation=1.0, offset=(0, 0)):
+        x, y = self.lerp_cell(self.get_previous_head(), self.head, interpolation)
+        return surface.blit(self.get_head_image(), (x + offset[0], y + offset[1]))
+    
+    def draw_tail(self, surface, interpolation=1.0, offset=(0, 0)):
+        # Segment sliding out of the cell the tail just left
+        if self.vacated is not None and len(self.body) > 1 and interpolation < 1:
+            x, y = self.lerp_cell(self.vacated, self.body[-1], interpolation)
+            surface.blit(self.body_surface, (x + offset[0], y + offset[1]))
+    
+    def get_dirty_rects(self):
+        # Screen areas the snake may paint (or leave) this frame
+        rects = []
+        if self.vacated is not None:
+            # The vacated cell and the tail cell the ghost slides into
+            for x, y in (self.vacated, self.body[-1]):
+                rects.append(pygame.Rect(x * BLOCK_SIZE, y * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE))
         
         if self.grow_effect_active:
-            # Calculate growth factor using sine wave for smooth animation
-            progress = self.grow_effect_timer / self.grow_effect_duration
-            # Higher at the beginning and lower towards the end
-            growth_factor = math.sin(progress * math.pi/2)
-            
-            # Apply growth factor with distance falloff (head grows most)
-            distance_factor = max(0, 1 - segment_index * 0.15)
-            size_increase = (self.max_grow_size - BLOCK_SIZE) * growth_factor * distance_factor
-            return base_size + size_increase
-        else:
-            return base_size
+            growth_factor = self.get_growth_factor()
+            cells = [self.get_previous_head()] + list(self.body)
+            for i, (cell_x, cell_y) in enumerate(cells):
+                # The interpolated head lies between its old and new cells
+                size = int(self.get_segment_size(max(0, i - 1), growth_factor))
+                glow_size = int(size * 1.2) + 2
+                rect = pygame.Rect(0, 0, glow_size, glow_size)
+                rect.center = (cell_x * BLOCK_SIZE + BLOCK_SIZE//2, cell_y * BLOCK_SIZE + BLOCK_SIZE//2)
+                rects.append(rect)
+            return rects
+        
+        # Outside the grow effect only the head, neck and vacated tail change
+        cells = [self.head]
+        if len(self.body) > 1:
+            cells.append(self.body[1])
+        rects += [pygame.Rect(x * BLOCK_SIZE, y * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE) for x, y in cells]
+        return rects
     
-    def draw(self, surface):
+    def draw(self, surface, interpolation=1.0):
+        # interpolation blends the ends of the snake between the previous
+        # and current tick; the middle of the body looks the same either way
+        if not self.grow_effect_active:
+            # Static segments come from the layer once the snake is long
+            # enough for one full-board blit to beat a blit per segment;
+            # only the ends are live
+            if len(self.body) > LAYER_MIN_SEGMENTS:
+                surface.blit(self.layer, (0, 0))
+            else:
+                body = self.body_surface
+                surface.blits(
+                    [(body, (x * BLOCK_SIZE, y * BLOCK_SIZE)) for x, y in islice(self.body, 1, None)],
+                    doreturn=False
+                )
+            self.draw_tail(surface, interpolation)
+            self.draw_head(surface, interpolation)
+            return
+        
+        # Everything that depends only on the frame is computed once
+        growth_factor = self.get_growth_factor()
+        alpha = int(80 * (self.grow_effect_timer / self.grow_effect_duration))
+        head_img = self.get_head_image()
+        self.draw_tail(surface, interpolation)
+        
         # Draw the snake (from tail to head for proper overlap)
-        for i in range(len(self.body)-1, -1, -1):
-            x, y = self.body[i]
-            
-            # Get the appropriate size for this segment
-            segment_size = self.get_segment_size(i)
-            
-            # Choose the appropriate directional image for head
-            if i == 0:  # Head
-                if self.direction == "RIGHT":
-                    segment_img = self.head_right
-                elif self.direction == "LEFT":
-                    segment_img = self.head_left
-                elif self.direction == "UP":
-                    segment_img = self.head_up
-                else:  # DOWN
-                    segment_img = self.head_down
-            else:  # Body segments
-                segment_img = self.body_surface
-            
-            # Scale image according to segment size
-            scaled_img = pygame.transform.scale(segment_img, (int(segment_size), int(segment_size)))
-            
-            # Center the segment (adjust position for growth)
-            offset_x = (segment_size - BLOCK_SIZE) / 2
-            offset_y = (segment_size - BLOCK_SIZE) / 2
+        i = len(self.body)
+        for cell_x, cell_y in reversed(self.body):
+            i -= 1
+            if i == 0:
+                cell_x, cell_y = self.lerp_cell(self.get_previous_head(), self.head, interpolation)
+                cell_x, cell_y = cell_x / BLOCK_SIZE, cell_y / BLOCK_SIZE
             
-            surface.blit(scaled_img, (x - offset_x, y - offset_y))
+            # Sizes are quantized to whole pixels, so segments past the
+            # falloff all share one cached sprite
+            size = int(self.get_segment_size(i, growth_factor))
+            if i == 0:
+                key = (self.direction, size, alpha)
+                image = head_img
+            else:
+                key = ("body", size, alpha)
+                image = self.body_surface
+            sprite = self.sprite_cache.get(
+                key, lambda: self.create_grow_sprite(image, size, alpha)
+            )
             
-            # Add subtle glow effect when growing
-            if self.grow_effect_active:
-                glow_size = segment_size * 1.2
-                glow_surface = pygame.Surface((int(glow_size), int(glow_size)), pygame.SRCALPHA)
-                alpha = int(80 * (self.grow_effect_timer / self.grow_effect_duration))
-                pygame.draw.circle(
-                    glow_surface, 
-                    (0, 255, 0, alpha), 
-                    (int(glow_size/2), int(glow_size/2)), 
-                    int(glow_size/2)
-                )
-                surface.blit(
-                    glow_surface, 
-                    (x + BLOCK_SIZE/2 - glow_size/2, y + BLOCK_SIZE/2 - glow_size/2)
-                )
+            # Sprite and glow are both centred on the cell
+            half = sprite.get_width() / 2
+            surface.blit(
+                sprite, 
+                (cell_x * BLOCK_SIZE + BLOCK_SIZE/2 - half, cell_y * BLOCK_SIZE + BLOCK_SIZE/2 - half)
+            )
+    
+    def draw_visible(self, surface, camera, interpolation=1.0):
+        # Scrolling boards: fetch just the segments inside the view from
+        # the bucket index, so the cost follows what is on screen rather
+        # than the length of the snake or the size of the board
+        offset = offset_x, offset_y = camera.get_offset()
+        cells = self.index.query(*camera.visible_cells(BLOCK_SIZE))
+        if not self.grow_effect_active:
+            body = self.body_surface
+            surface.blits(
+                [(body, (x * BLOCK_SIZE + offset_x, y * BLOCK_SIZE + offset_y)) for x, y in cells],
+                doreturn=False
+            )
+            self.draw_tail(surface, interpolation, offset)
+            self.draw_head(surface, interpolation, offset)
+            return
+        
+        growth_factor = self.get_growth_factor()
+        alpha = int(80 * (self.grow_effect_timer / self.grow_effect_duration))
+        self.draw_tail(surface, interpolation, offset)
+        
+        # Segments past the falloff all share one sprite and go down first
+        # in any order; the few nearer the head follow from tail to head
+        falloff = int(1 / GROW_FALLOFF) + 1
+        near = [tuple(cell) for cell in islice(self.body, 1, falloff)]
+        size = int(self.get_segment_size(falloff, growth_factor))
+        sprite = self.sprite_cache.get(
+            ("body", size, alpha), lambda: self.create_grow_sprite(self.body_surface, size, alpha)
+        )
+        shift_x = offset_x + BLOCK_SIZE/2 - sprite.get_width() / 2
+        shift_y = offset_y + BLOCK_SIZE/2 - sprite.get_width() / 2
+        surface.blits(
+            [
+                (sprite, (x * BLOCK_SIZE + shift_x, y * BLOCK_SIZE + shift_y))
+                for x, y in cells if (x, y) not in near
+            ],
+            doreturn=False
+        )
+        
+        head = self.lerp_cell(self.get_previous_head(), self.head, interpolation)
+        segments = [(x * BLOCK_SIZE, y * BLOCK_SIZE) for x, y in near]
+        for i in range(len(near), -1, -1):
+            x, y = segments[i - 1] if i else head
+            size = int(self.get_segment_size(i, growth_factor))
+            if i == 0:
+                key = (self.direction, size, alpha)
+                image = self.get_head_image()
+            else:
+                key = ("body", size, alpha)
+                image = self.body_surface
+            sprite = self.sprite_cache.get(
+                key, lambda: self.create_grow_sprite(image, size, alpha)
+            )
+            half = sprite.get_width() / 2
+            surface.blit(sprite, (x + offset_x + BLOCK_SIZE/2 - half, y + offset_y + BLOCK_SIZE/2 - half))
 
-class Food:
-    def __init__(self):
-        self.position = self.randomize_position()
+class Food(engine.Food):
+    """Renders an engine food item; positions are grid cells."""
+    
+    def __init__(self, cols=GRID_COLS, rows=GRID_ROWS):
+        super().__init__(cols, rows)
         self.shimmer_offset = 0
         self.shimmer_direction = 1
+        self.pulse_time = 0  # Milliseconds of play, so pausing freezes the pulse
         
         # Create food surface with details
         self.food_surface = self.create_food()
@@ -388,32 +529,26 @@ class Food:
         
         return surface
     
-    def randomize_position(self):
-        # Makes sure food doesn't spawn on grid boundaries
-        cols = WIDTH // BLOCK_SIZE
-        rows = HEIGHT // BLOCK_SIZE
-        x = random.randint(0, cols - 1) * BLOCK_SIZE
-        y = random.randint(0, rows - 1) * BLOCK_SIZE
-        return [x, y]
-    
-    def reposition(self, snake_body):
-        # Prevent food from spawning on snake
-        new_pos = self.randomize_position()
-        while new_pos in snake_body:
-            new_pos = self.randomize_position()
-        self.position = new_pos
-    
-    def update(self):
+    def update(self, elapsed=0):
+        self.pulse_time += elapsed
+        
         # Add shimmer effect
         self.shimmer_offset += 0.2 * self.shimmer_direction
         if abs(self.shimmer_offset) > 3:
             self.shimmer_direction *= -1
     
-    def draw(self, surface):
-        x, y = self.position
+    def get_rect(self):
+        # Bounds of the food and its largest shimmer glow
+        radius = BLOCK_SIZE + 5
+        x, y = self.position[0] * BLOCK_SIZE, self.position[1] * BLOCK_SIZE
+        return pygame.Rect(x + BLOCK_SIZE//2 - radius, y + BLOCK_SIZE//2 - radius, radius * 2, radius * 2)
+    
+    def draw(self, surface, offset=(0, 0)):
+        x = self.position[0] * BLOCK_SIZE + offset[0]
+        y = self.position[1] * BLOCK_SIZE + offset[1]
         
         # Apply shimmer/pulsing effect
-        scale_factor = 1.0 + math.sin(pygame.time.get_ticks() * 0.005) * 0.1
+        scale_factor = 1.0 + math.sin(self.pulse_time * 0.005) * 0.1
         scaled_size = int(BLOCK_SIZE * scale_factor)
         scaled_img = pygame.transform.scale(self.food_surface, (scaled_size, scaled_size))
         
@@ -428,115 +563,224 @@ class Food:
         surface.blit(glow_surface, (x + BLOCK_SIZE//2 - glow_radius, y + BLOCK_SIZE//2 - glow_radius))
 
 class Game:
-    def __init__(self):
+    def __init__(self, dirty_rects=False, max_catch_up=MAX_CATCH_UP_TICKS,
+                 seed=None, record_path=None, replay=None, replay_speed=1.0, profile=False,
+                 player=None, autopilot=False, world_size=None):
         self.state = GameState.MENU
-        self.snake = Snake(WIDTH // 2, HEIGHT // 2)
-        self.food = Food()
+        self.screen = resources.get_display((WIDTH, HEIGHT), "Ultra Snake 3D")
+        self.sounds = SoundBank(SOUND_PATHS)
+        self.profiler = FrameProfiler(enabled=profile)  # F3 overlay, F4 trace
+        
+        # Seeded runs: a fixed seed repeats the same game, a replay plays
+        # back a recorded one, and record_path saves each finished game
+        self.seed = seed
+        self.record_path = record_path
+        self.playback = Playback(replay) if replay is not None else None
+        self.replay_speed = replay_speed if replay is not None else 1.0
+        if replay is not None:
+            max_catch_up = max_catch_up * math.ceil(self.replay_speed)
+        # Board size in cells; replays carry their own
+        if replay is not None:
+            world_size = (replay.cols, replay.rows)
+        cols, rows = world_size or (GRID_COLS, GRID_ROWS)
+        self.autopilot = Autopilot(cols, rows) if autopilot and replay is None else None  # Replays steer themselves
+        
+        self.high_scores = HighScoreStore()
+        self.leaderboard = Leaderboard(player=player)  # Every finished session
+        self.play_time = 0  # Milliseconds spent playing this session
+        self.snake = Snake(cols // 2, rows // 2, self.high_scores, cols, rows)
+        # Only the player's own games set records (not replays or the bot)
+        self.snake.track_high_score = self.playback is None and self.autopilot is None
+        self.food = Food(cols, rows)
+        self.world = engine.World(cols, rows, self.snake, self.food, self.get_seed())
         self.clock = pygame.time.Clock()
-        self.last_update_time = pygame.time.get_ticks()
-        self.particles = []  # For visual effects
-        
-        # Create grid and background
-        self.background = self.create_background()
-        self.grid_surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        self.create_grid_background()
+        self.wake_event = None  # Input that ended an idle wait
+        self.last_update_time = get_ticks()
+        self.timestep = engine.FixedTimestep(max_catch_up)
+        self.particles = ParticleSystem()  # For visual effects
+        self.particles.reseed(self.world.seed)
+        self.history = snapshot.History(REWIND_HISTORY_TICKS)  # For rewinding
+        
+        # Boards other than the window's own size go through the camera
+        if self.snake.uses_camera():
+            self.camera = Camera(WIDTH, HEIGHT, cols * BLOCK_SIZE, rows * BLOCK_SIZE)
+        else:
+            self.camera = None
+        
+        # Gradient and grid baked into one opaque surface (the grid scrolls
+        # separately when the camera moves)
+        self.backdrop = None
+        self.backdrop_key = None
+        self.get_backdrop()
+        
+        # Dirty-rect rendering: only repaint what changed while playing
+        # (a scrolling view changes everywhere, so it always repaints)
+        self.dirty_rects = dirty_rects and self.camera is None
+        self.panel_rect = pygame.Rect(0, 0, WIDTH, 40)
+        self.previous_rects = []
+        self.panel_values = None
+        self.last_drawn_state = None
+        
+        # Scene, HUD and dimmed panel composited once on pausing or game over
+        self.freeze_frame = None
+        self.freeze_key = None
+        
+        # Rendered text and prebuilt panels/overlays, keyed by what they show
+        self.text_cache = SurfaceCache(256)
+        self.overlay_cache = SurfaceCache(32)
     
-    def create_background(self):
+    def create_background(self, width, height):
         """Create a professional looking background with gradient"""
-        background = pygame.Surface((WIDTH, HEIGHT))
+        background = pygame.Surface((width, height))
         
         # Dark gradient from top to bottom
-        for y in range(HEIGHT):
+        for y in range(height):
             # Calculate gradient color (darker at bottom)
-            gradient_value = max(5, 30 - int(y / HEIGHT * 25))
+            gradient_value = max(5, 30 - int(y / height * 25))
             color = (gradient_value, gradient_value, gradient_value)
             
             # Draw horizontal line with this color
-            pygame.draw.line(background, color, (0, y), (WIDTH, y))
+            pygame.draw.line(background, color, (0, y), (width, y))
             
         return background
     
-    def create_grid_background(self):
+    def create_grid_background(self, width, height):
         # Create subtle grid pattern
-        self.grid_surface.fill((0, 0, 0, 0))  # Clear with transparent
+        grid_surface = pygame.Surface((width, height), pygame.SRCALPHA)
         
         # Draw vertical grid lines
-        for x in range(0, WIDTH, BLOCK_SIZE):
+        for x in range(0, width, BLOCK_SIZE):
             alpha = 30  # Base alpha value for grid
             # Every 5th line is brighter
             if x % (BLOCK_SIZE * 5) == 0:
                 alpha = 60
-            pygame.draw.line(self.grid_surface, (100, 100, 100, alpha), (x, 0), (x, HEIGHT))
+            pygame.draw.line(grid_surface, (100, 100, 100, alpha), (x, 0), (x, height))
         
         # Draw horizontal grid lines
-        for y in range(0, HEIGHT, BLOCK_SIZE):
+        for y in range(0, height, BLOCK_SIZE):
             alpha = 30  # Base alpha value for grid
             # Every 5th line is brighter
             if y % (BLOCK_SIZE * 5) == 0:
                 alpha = 60
-            pygame.draw.line(self.grid_surface, (100, 100, 100, alpha), (0, y), (WIDTH, y))
+            pygame.draw.line(grid_surface, (100, 100, 100, alpha), (0, y), (width, y))
+        
+        return grid_surface
+    
+    def create_backdrop(self, width, height):
+        """Bake gradient and grid into one opaque, display-format surface"""
+        backdrop = self.create_background(width, height)
+        if self.camera is None:
+            backdrop.blit(self.create_grid_background(width, height), (0, 0))
+        return backdrop.convert()
+    
+    def create_grid_tile(self):
+        # Window-sized grid plus one period of brighter lines to scroll by
+        period = BLOCK_SIZE * 5
+        return self.create_grid_background(WIDTH + period, HEIGHT + period)
+    
+    def draw_grid(self, offset):
+        # Scrolling grid, aligned to the board and clipped to its area
+        period = BLOCK_SIZE * 5
+        board = pygame.Rect(offset, (self.camera.world_width, self.camera.world_height))
+        tile = self.overlay_cache.get("grid_tile", self.create_grid_tile)
+        self.screen.set_clip(board)
+        self.screen.blit(tile, (offset[0] % period - period, offset[1] % period - period))
+        self.screen.set_clip(None)
+        if not board.contains(self.screen.get_rect()):
+            pygame.draw.rect(self.screen, (100, 100, 100), board.inflate(2, 2), 1)
+    
+    def get_backdrop(self):
+        # Rebuilt only when the window size or BLOCK_SIZE changes
+        key = (self.screen.get_size(), BLOCK_SIZE)
+        if key != self.backdrop_key:
+            self.backdrop = self.create_backdrop(*key[0])
+            self.backdrop_key = key
+        return self.backdrop
     
     def add_particles(self, x, y, color, count=10):
-        for _ in range(count):
-            particle = {
-                'x': x + BLOCK_SIZE//2,
-                'y': y + BLOCK_SIZE//2,
-                'vel_x': random.uniform(-2, 2),
-                'vel_y': random.uniform(-2, 2),
-                'radius': random.randint(2, 5),
-                'color': color,
-                'life': 30
-            }
-            self.particles.append(particle)
+        self.particles.emit(x + BLOCK_SIZE//2, y + BLOCK_SIZE//2, color, count)
     
     def update_particles(self):
-        particles_to_keep = []
-        for particle in self.particles:
-            # Update position
-            particle['x'] += particle['vel_x']
-            particle['y'] += particle['vel_y']
-            
-            # Apply gravity
-            particle['vel_y'] += 0.1
-            
-            # Reduce life
-            particle['life'] -= 1
-            
-            if particle['life'] > 0:
-                particles_to_keep.append(particle)
-        
-        self.particles = particles_to_keep
+        self.particles.update()
     
-    def draw_particles(self, surface):
-        for particle in self.particles:
-            alpha = min(255, particle['life'] * 8)
-            color = (*particle['color'][:3], alpha)
-            pygame.draw.circle(
-                surface, 
-                color, 
-                (int(particle['x']), int(particle['y'])), 
-                particle['radius']
-            )
+    def get_particle_rects(self):
+        return self.particles.get_rects()
+    
+    def get_scene_rects(self):
+        # Everything drawn on top of the backdrop while playing
+        return [self.food.get_rect()] + self.snake.get_dirty_rects() + self.get_particle_rects()
+    
+    def draw_particles(self, surface, offset=(0, 0)):
+        self.particles.draw(surface, offset)
+    
+    def get_idle_timeout(self):
+        # None while something moves every frame; otherwise how long the
+        # loop may sleep waiting for input before drawing again
+        if self.state == GameState.PLAYING or self.profiler.overlay_visible:
+            return None
+        if self.state == GameState.MENU:
+            return 1000 // MENU_FPS
+        return IDLE_REDRAW_MS
+    
+    def wait_for_frame(self):
+        timeout = self.get_idle_timeout()
+        if timeout is None:
+            self.clock.tick(60)  # Cap framerate at 60 FPS
+            return
+        
+        # Static scene: block until input arrives or a redraw is due, so
+        # idle states cost next to no CPU; input is handled immediately
+        event = pygame.event.wait(timeout)
+        if event.type != pygame.NOEVENT:
+            self.wake_event = event
+        self.clock.tick()
     
     def handle_events(self):
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        if self.wake_event is not None:
+            events.insert(0, self.wake_event)
+            self.wake_event = None
+        
+        for event in events:
             if event.type == pygame.QUIT:
                 return False
                 
             if event.type == pygame.KEYDOWN:
+                # Profiler overlay and trace export work in every state
+                if event.key == pygame.K_F3:
+                    self.profiler.toggle_overlay()
+                elif event.key == pygame.K_F4 and self.profiler.trace:
+                    self.profiler.export_chrome_trace(TRACE_PATH)
+                    print(f"Profiler trace written to {TRACE_PATH}")
+                
+                # Quick-save, quick-load and rewind (not while watching a replay;
+                # a finished game is already on the leaderboard, so no rewind)
+                if self.playback is None:
+                    if event.key == pygame.K_F5 and self.state in (GameState.PLAYING, GameState.PAUSED):
+                        self.quick_save()
+                        continue
+                    elif event.key == pygame.K_F9:
+                        self.quick_load()
+                        continue
+                    elif event.key == pygame.K_BACKSPACE and self.state in (GameState.PLAYING, GameState.PAUSED):
+                        self.rewind()
+                        continue
+                
                 if self.state == GameState.MENU:
                     if event.key == pygame.K_SPACE:
-                        self.state = GameState.PLAYING
+                        self.resume()
                 
                 elif self.state == GameState.PLAYING:
-                    if event.key == pygame.K_RIGHT:
-                        self.snake.change_direction("RIGHT")
+                    if (self.playback is not None or self.autopilot is not None) and event.key != pygame.K_p:
+                        pass  # Replays and the autopilot ignore steering
+                    elif event.key == pygame.K_RIGHT:
+                        self.snake.queue_direction("RIGHT")
                     elif event.key == pygame.K_LEFT:
-                        self.snake.change_direction("LEFT")
+                        self.snake.queue_direction("LEFT")
                     elif event.key == pygame.K_UP:
-                        self.snake.change_direction("UP")
+                        self.snake.queue_direction("UP")
                     elif event.key == pygame.K_DOWN:
-                        self.snake.change_direction("DOWN")
+                        self.snake.queue_direction("DOWN")
                     elif event.key == pygame.K_p:
                         self.state = GameState.PAUSED
                 
@@ -548,221 +792,666 @@ class Game:
                 
                 elif self.state == GameState.PAUSED:
                     if event.key == pygame.K_p or event.key == pygame.K_SPACE:
-                        self.state = GameState.PLAYING
+                        self.resume()
                     elif event.key == pygame.K_q:
                         self.state = GameState.MENU
         
         return True
     
+    def resume(self):
+        # Idle waits can be long; don't count them as elapsed game time
+        self.state = GameState.PLAYING
+        self.last_update_time = get_ticks()
+        self.freeze_key = None  # The next pause or game over is a new picture
+    
+    def get_seed(self):
+        # None lets the world pick a fresh random seed
+        if self.playback is not None:
+            return self.playback.replay.seed
+        return self.seed
+    
+    def get_tick_interval(self):
+        # Milliseconds per simulation tick (replays may run faster)
+        return 1000 / (self.snake.speed * self.replay_speed)
+    
+    def end_game(self):
+        self.state = GameState.GAME_OVER
+        self.high_scores.flush()
+        if self.playback is None and self.autopilot is None:
+            self.leaderboard.record(
+                self.snake.score, len(self.snake.body), self.play_time,
+                self.world.ticks, self.world.seed
+            )
+        if self.record_path is not None and self.playback is None:
+            Replay.from_world(self.world).save(self.record_path)
+    
+    def step_world(self):
+        # Advance the simulation by one tick and react to what happened
+        direction = None
+        if self.playback is not None:
+            if self.playback.finished(self.world.ticks):
+                self.end_game()
+                return
+            direction = self.playback.direction_at(self.world.ticks)
+        elif self.autopilot is not None:
+            direction = self.autopilot.choose(self.world)
+        result = self.history.step(self.world, direction)
+        head_x = self.snake.head[0] * BLOCK_SIZE
+        head_y = self.snake.head[1] * BLOCK_SIZE
+        
+        # Check for collisions
+        if result == StepResult.DIED:
+            self.sounds.play("crash")
+            self.add_particles(head_x, head_y, RED, 30)
+            self.end_game()
+        
+        # Check if snake ate food (the head sits where it was)
+        elif result == StepResult.ATE or result == StepResult.WON:
+            self.sounds.play("eat")
+            self.add_particles(head_x, head_y, GOLD, 20)
+            
+            # Snake filled the whole board
+            if result == StepResult.WON:
+                self.end_game()
+    
     def update(self):
+        current_time = get_ticks()
+        elapsed = current_time - self.last_update_time
+        self.last_update_time = current_time
+        
         if self.state == GameState.PLAYING:
-            # Move the snake based on its current speed
-            current_time = pygame.time.get_ticks()
-            time_since_last_update = current_time - self.last_update_time
+            self.play_time += elapsed
             
-            if time_since_last_update > 1000 / self.snake.speed:
-                self.snake.move()
-                self.last_update_time = current_time
-                
-                # Check for collisions
-                if self.snake.check_collision():
-                    if sounds_loaded:
-                        crash_sound.play()
-                    self.add_particles(self.snake.head[0], self.snake.head[1], RED, 30)
-                    self.state = GameState.GAME_OVER
-                
-                # Check if snake ate food
-                if self.snake.head == self.food.position:
-                    if sounds_loaded:
-                        eat_sound.play()
-                    self.snake.grow()
-                    self.add_particles(self.food.position[0], self.food.position[1], GOLD, 20)
-                    self.food.reposition(self.snake.body)
+            # Run fixed ticks at the snake's speed for the time that passed,
+            # independent of how often frames are drawn
+            self.timestep.advance(elapsed)
+            while self.state == GameState.PLAYING and self.timestep.next_tick(self.get_tick_interval()):
+                self.step_world()
             
             # Update food animation independent of snake movement
-            self.food.update()
+            self.food.update(elapsed)
             
             # Update particles
             self.update_particles()
     
+    def get_interpolation(self):
+        # Fraction of the way to the next tick, used to smooth rendering
+        if self.state == GameState.GAME_OVER:
+            return 1.0
+        return self.timestep.alpha(self.get_tick_interval())
+    
     def draw(self):
-        # Clear screen with background
-        screen.blit(self.background, (0, 0))
+        profiler = self.profiler
+        profiler.update_overlay()
+        
+        if self.dirty_rects:
+            # Any state change repaints the whole window once
+            playing = self.state == GameState.PLAYING
+            if playing and self.last_drawn_state == GameState.PLAYING:
+                self.draw_dirty()
+                return
+            self.last_drawn_state = self.state
+            if playing:
+                self.previous_rects = self.get_scene_rects()
+                self.panel_values = (self.snake.score, self.snake.high_score)
+        
+        # Paused and game-over scenes are frozen: reuse the last composite
+        frozen = self.state == GameState.PAUSED or self.state == GameState.GAME_OVER
+        if frozen and self.freeze_key == self.get_freeze_key():
+            with profiler.phase("freeze_frame"):
+                self.screen.blit(self.freeze_frame, (0, 0))
+        else:
+            self.draw_frame()
+            if frozen:
+                self.freeze_frame = self.screen.copy()
+                self.freeze_key = self.get_freeze_key()
+        
+        profiler.draw_overlay(self.screen)
+        with profiler.phase("display"):
+            pygame.display.update()
+    
+    def draw_frame(self):
+        profiler = self.profiler
         
-        # Draw grid background
-        screen.blit(self.grid_surface, (0, 0))
+        # Clear screen with the prebaked background and grid
+        with profiler.phase("background"):
+            self.screen.blit(self.get_backdrop(), (0, 0))
         
         if self.state == GameState.MENU:
-            self.draw_menu()
+            with profiler.phase("menu"):
+                self.draw_menu()
         
         elif self.state == GameState.PLAYING or self.state == GameState.PAUSED:
-            # Draw game elements
-            self.food.draw(screen)
-            self.snake.draw(screen)
-            self.draw_particles(screen)
-            self.draw_score()
+            self.draw_scene()
             
             if self.state == GameState.PAUSED:
-                self.draw_pause_screen()
+                with profiler.phase("overlay"):
+                    self.draw_pause_screen()
         
         elif self.state == GameState.GAME_OVER:
-            # Draw game elements
-            self.food.draw(screen)
-            self.snake.draw(screen)
-            self.draw_particles(screen)
+            self.draw_scene()
+            with profiler.phase("overlay"):
+                self.draw_game_over()
+    
+    def get_freeze_key(self):
+        # Everything a paused or game-over frame depends on; nothing moves
+        # in those states, so this only changes when the game does
+        return (
+            self.state, self.world.ticks, self.snake.score, self.snake.high_score,
+            self.world.won, self.backdrop_key
+        )
+    
+    def draw_scene(self):
+        # Draw game elements
+        profiler = self.profiler
+        if self.camera is not None:
+            self.draw_scrolling_scene()
+            return
+        with profiler.phase("food"):
+            self.food.draw(self.screen)
+        with profiler.phase("snake"):
+            self.snake.draw(self.screen, self.get_interpolation())
+        with profiler.phase("particles"):
+            self.draw_particles(self.screen)
+        with profiler.phase("hud"):
             self.draw_score()
-            self.draw_game_over()
-        
-        pygame.display.update()
     
-    def draw_menu(self):
-        # Draw title with glow effect
+    def draw_scrolling_scene(self):
+        # Boards bigger than the window: centre the view on the head and
+        # draw only what falls inside it (smaller boards stay centred)
+        profiler = self.profiler
+        interpolation = self.get_interpolation()
+        x, y = self.snake.lerp_cell(self.snake.get_previous_head(), self.snake.head, interpolation)
+        self.camera.follow(x + BLOCK_SIZE//2, y + BLOCK_SIZE//2)
+        offset = self.camera.get_offset()
+        
+        with profiler.phase("background"):
+            self.draw_grid(offset)
+        with profiler.phase("food"):
+            if self.food.get_rect().move(offset).colliderect(self.screen.get_rect()):
+                self.food.draw(self.screen, offset)
+        with profiler.phase("snake"):
+            self.snake.draw_visible(self.screen, self.camera, interpolation)
+        with profiler.phase("particles"):
+            self.draw_particles(self.screen, offset)
+        with profiler.phase("hud"):
+            self.draw_score()
+    
+    def draw_dirty(self):
+        # Restore last frame's and this frame's areas from the backdrop,
+        # repaint only those, and push just that rect list to the display
+        profiler = self.profiler
+        current = self.get_scene_rects()
+        overlay_rect = profiler.get_overlay_rect(self.screen)
+        if overlay_rect is not None:
+            current.append(overlay_rect)
+        dirty = self.previous_rects + current
+        
+        # The panel is translucent, so it is redrawn whole when touched
+        panel_values = (self.snake.score, self.snake.high_score)
+        if panel_values != self.panel_values or self.panel_rect.collidelist(dirty) != -1:
+            dirty.append(self.panel_rect)
+            self.panel_values = panel_values
+            draw_panel = True
+        else:
+            draw_panel = False
+        
+        with profiler.phase("background"):
+            backdrop = self.get_backdrop()
+            for rect in dirty:
+                self.screen.blit(backdrop, rect, rect)
+        
+        with profiler.phase("food"):
+            self.food.draw(self.screen)
+        with profiler.phase("snake"):
+            interpolation = self.get_interpolation()
+            if self.snake.grow_effect_active:
+                self.snake.draw(self.screen, interpolation)
+            else:
+                for rect in dirty:
+                    self.screen.blit(self.snake.layer, rect, rect)
+                self.snake.draw_tail(self.screen, interpolation)
+                self.snake.draw_head(self.screen, interpolation)
+        with profiler.phase("particles"):
+            self.draw_particles(self.screen)
+        if draw_panel:
+            with profiler.phase("hud"):
+                self.draw_score()
+        
+        profiler.draw_overlay(self.screen)
+        with profiler.phase("display"):
+            pygame.display.update(dirty)
+        self.previous_rects = current
+    
+    def render_text(self, font, text, color):
+        # Rendered text is reused until the string itself changes
+        return self.text_cache.get((font, text, color), lambda: font.render(text, True, color))
+    
+    def cache_stats(self):
+        return {
+            "text_hits": self.text_cache.hits,
+            "text_misses": self.text_cache.misses,
+            "overlay_hits": self.overlay_cache.hits,
+            "overlay_misses": self.overlay_cache.misses,
+        }
+    
+    def create_menu_glow(self, glow_radius):
         glow_surface = pygame.Surface((WIDTH, 100), pygame.SRCALPHA)
-        glow_radius = 50 + math.sin(pygame.time.get_ticks() * 0.001) * 5
         pygame.draw.ellipse(
             glow_surface, 
             (0, 100, 0, 50), 
             [WIDTH//2 - glow_radius*2, 10, glow_radius*4, glow_radius*2]
         )
-        screen.blit(glow_surface, (0, HEIGHT//4 - 20))
+        return glow_surface
+    
+    def draw_menu(self):
+        # Draw title with glow effect (radius quantized to whole pixels)
+        glow_radius = int(50 + math.sin(get_ticks() * 0.001) * 5)
+        glow_surface = self.overlay_cache.get(
+            ("menu_glow", glow_radius), lambda: self.create_menu_glow(glow_radius)
+        )
+        self.screen.blit(glow_surface, (0, HEIGHT//4 - 20))
         
         # Title with shadow effect
-        title_shadow = title_font.render("ULTRA SNAKE 3D", True, (0, 50, 0))
-        title = title_font.render("ULTRA SNAKE 3D", True, GREEN)
-        screen.blit(title_shadow, (WIDTH//2 - title.get_width()//2 + 2, HEIGHT//4 + 2))
-        screen.blit(title, (WIDTH//2 - title.get_width()//2, HEIGHT//4))
-        
-        # Draw high score
-        high_score_text = score_font.render(f"High Score: {self.snake.high_score}", True, GOLD)
-        screen.blit(high_score_text, (WIDTH//2 - high_score_text.get_width()//2, HEIGHT//2))
+        title_shadow = self.render_text(fonts.title, "ULTRA SNAKE 3D", (0, 50, 0))
+        title = self.render_text(fonts.title, "ULTRA SNAKE 3D", GREEN)
+        self.screen.blit(title_shadow, (WIDTH//2 - title.get_width()//2 + 2, HEIGHT//4 + 2))
+        self.screen.blit(title, (WIDTH//2 - title.get_width()//2, HEIGHT//4))
+        
+        # Draw high scores from the leaderboard's in-memory snapshot
+        leaderboard = self.leaderboard.snapshot
+        best = max(leaderboard.best, self.snake.high_score)
+        high_score_text = self.render_text(fonts.score, f"High Score: {best}", GOLD)
+        self.screen.blit(high_score_text, (WIDTH//2 - high_score_text.get_width()//2, HEIGHT//2))
+        
+        week_best = leaderboard.this_week[0][1] if leaderboard.this_week else 0
+        recent_text = self.render_text(
+            fonts.score, f"This Week: {week_best}   Your Best: {leaderboard.player_best}", WHITE
+        )
+        self.screen.blit(recent_text, (WIDTH//2 - recent_text.get_width()//2, HEIGHT//2 + 35))
         
         # Draw instructions
-        start_text = menu_font.render("Press SPACE to Start", True, WHITE)
-        screen.blit(start_text, (WIDTH//2 - start_text.get_width()//2, HEIGHT * 3//4))
+        start_text = self.render_text(fonts.menu, "Press SPACE to Start", WHITE)
+        self.screen.blit(start_text, (WIDTH//2 - start_text.get_width()//2, HEIGHT * 3//4))
         
         # Animating snake on menu screen
-        t = pygame.time.get_ticks() / 1000
+        t = get_ticks() / 1000
         for i in range(5):
             x = WIDTH//2 + math.cos(t + i/2) * 100 - BLOCK_SIZE//2
             y = HEIGHT//2 + math.sin(t + i/2) * 50 - BLOCK_SIZE//2
             
             segment_img = self.snake.head_right if i == 0 else self.snake.body_surface
-            screen.blit(segment_img, (x, y))
+            self.screen.blit(segment_img, (x, y))
     
-    def draw_score(self):
-        # Draw score panel with background
+    def create_score_panel(self):
         panel_height = 40
         panel_surface = pygame.Surface((WIDTH, panel_height), pygame.SRCALPHA)
         panel_surface.fill((0, 0, 0, 150))
+        return panel_surface
+    
+    def draw_score(self):
+        # Draw score panel with background
+        panel_surface = self.overlay_cache.get("score_panel", self.create_score_panel)
         
         # Score text with shadow
-        score_shadow = score_font.render(f"Score: {self.snake.score}", True, (50, 50, 50))
-        score_text = score_font.render(f"Score: {self.snake.score}", True, WHITE)
+        score_shadow = self.render_text(fonts.score, f"Score: {self.snake.score}", (50, 50, 50))
+        score_text = self.render_text(fonts.score, f"Score: {self.snake.score}", WHITE)
         
         # High score with shadow
-        high_score_shadow = score_font.render(f"High Score: {self.snake.high_score}", True, (100, 100, 0))
-        high_score_text = score_font.render(f"High Score: {self.snake.high_score}", True, GOLD)
-        
-        # Draw panel and text
-        screen.blit(panel_surface, (0, 0))
-        screen.blit(score_shadow, (12, 7))
-        screen.blit(score_text, (10, 5))
-        screen.blit(high_score_shadow, (WIDTH - high_score_text.get_width() - 8, 7))
-        screen.blit(high_score_text, (WIDTH - high_score_text.get_width() - 10, 5))
+        high_score_shadow = self.render_text(fonts.score, f"High Score: {self.snake.high_score}", (100, 100, 0))
+        high_score_text = self.render_text(fonts.score, f"High Score: {self.snake.high_score}", GOLD)
+        
+        # Draw panel and text (text goes straight to the screen so its
+        # antialiasing blends exactly as before)
+        self.screen.blit(panel_surface, (0, 0))
+        self.screen.blit(score_shadow, (12, 7))
+        self.screen.blit(score_text, (10, 5))
+        self.screen.blit(high_score_shadow, (WIDTH - high_score_text.get_width() - 8, 7))
+        self.screen.blit(high_score_text, (WIDTH - high_score_text.get_width() - 10, 5))
     
-    def draw_pause_screen(self):
-        # Semi-transparent overlay
+    def create_overlay(self, panel_height, border_color, title, title_shadow_color, lines):
+        """Build a dimmed full-screen overlay with a bordered panel of text.
+        
+        lines holds (font, text, color, y offset within the panel).
+        """
         overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
         overlay.fill((0, 0, 0, 150))
-        screen.blit(overlay, (0, 0))
         
-        # Pause container
-        panel_width, panel_height = 400, 200
+        # Panel with border
+        panel_width = 400
         panel_x = WIDTH//2 - panel_width//2
         panel_y = HEIGHT//2 - panel_height//2
-        
-        # Draw panel with border
-        pygame.draw.rect(screen, (40, 40, 40), 
+        pygame.draw.rect(overlay, (40, 40, 40), 
                          [panel_x, panel_y, panel_width, panel_height])
-        pygame.draw.rect(screen, GREEN, 
+        pygame.draw.rect(overlay, border_color, 
                          [panel_x, panel_y, panel_width, panel_height], 2)
         
-        # Pause text with shadow
-        pause_shadow = title_font.render("PAUSED", True, (0, 50, 0))
-        pause_text = title_font.render("PAUSED", True, GREEN)
-        
-        screen.blit(pause_shadow, (WIDTH//2 - pause_text.get_width()//2 + 2, panel_y + 20 + 2))
-        screen.blit(pause_text, (WIDTH//2 - pause_text.get_width()//2, panel_y + 20))
+        # Title text with shadow
+        title_shadow = self.render_text(fonts.title, title, title_shadow_color)
+        title_text = self.render_text(fonts.title, title, border_color)
+        overlay.blit(title_shadow, (WIDTH//2 - title_text.get_width()//2 + 2, panel_y + 20 + 2))
+        overlay.blit(title_text, (WIDTH//2 - title_text.get_width()//2, panel_y + 20))
         
-        # Instructions
-      # Instructions
-        resume_text = menu_font.render("Press SPACE to Resume", True, WHITE)
-        screen.blit(resume_text, (WIDTH//2 - resume_text.get_width()//2, panel_y + 80))
+        for font, text, color, offset in lines:
+            rendered = self.render_text(font, text, color)
+            overlay.blit(rendered, (WIDTH//2 - rendered.get_width()//2, panel_y + offset))
         
-        quit_text = menu_font.render("Press Q to Main Menu", True, WHITE)
-        screen.blit(quit_text, (WIDTH//2 - quit_text.get_width()//2, panel_y + 120))
+        return overlay
+    
+    def draw_pause_screen(self):
+        # Overlay never changes, so it is built once
+        overlay = self.overlay_cache.get("pause", lambda: self.create_overlay(
+            200, GREEN, "PAUSED", (0, 50, 0), [
+                (fonts.menu, "Press SPACE to Resume", WHITE, 80),
+                (fonts.menu, "Press Q to Main Menu", WHITE, 120),
+            ]
+        ))
+        self.screen.blit(overlay, (0, 0))
     
     def draw_game_over(self):
-        # Semi-transparent overlay
-        overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 150))
-        screen.blit(overlay, (0, 0))
+        # The overlay is built once per title; only the two score lines
+        # change between games, so they are drawn on top of it
+        title = "YOU WIN!" if self.world.won else "GAME OVER"
+        panel_height = 250
+        overlay = self.overlay_cache.get(("game_over", title), lambda: self.create_overlay(
+            panel_height, RED, title, (100, 0, 0), [
+                (fonts.menu, "Press R to Restart", WHITE, 170),
+                (fonts.menu, "Press Q to Quit", WHITE, 200),
+            ]
+        ))
+        self.screen.blit(overlay, (0, 0))
         
-        # Game over container
-        panel_width, panel_height = 400, 250
-        panel_x = WIDTH//2 - panel_width//2
         panel_y = HEIGHT//2 - panel_height//2
-        
-        # Draw panel with border
-        pygame.draw.rect(screen, (40, 40, 40), 
-                         [panel_x, panel_y, panel_width, panel_height])
-        pygame.draw.rect(screen, RED, 
-                         [panel_x, panel_y, panel_width, panel_height], 2)
-        
-        # Game over text with shadow
-        gameover_shadow = title_font.render("GAME OVER", True, (100, 0, 0))
-        gameover_text = title_font.render("GAME OVER", True, RED)
-        
-        screen.blit(gameover_shadow, (WIDTH//2 - gameover_text.get_width()//2 + 2, panel_y + 20 + 2))
-        screen.blit(gameover_text, (WIDTH//2 - gameover_text.get_width()//2, panel_y + 20))
-        
-        # Score display
-        score_text = score_font.render(f"Score: {self.snake.score}", True, WHITE)
-        screen.blit(score_text, (WIDTH//2 - score_text.get_width()//2, panel_y + 80))
-        
-        high_score_text = score_font.render(f"High Score: {self.snake.high_score}", True, GOLD)
-        screen.blit(high_score_text, (WIDTH//2 - high_score_text.get_width()//2, panel_y + 120))
-        
-        # Instructions
-        restart_text = menu_font.render("Press R to Restart", True, WHITE)
-        screen.blit(restart_text, (WIDTH//2 - restart_text.get_width()//2, panel_y + 170))
-        
-        quit_text = menu_font.render("Press Q to Quit", True, WHITE)
-        screen.blit(quit_text, (WIDTH//2 - quit_text.get_width()//2, panel_y + 200))
+        for text, color, offset in (
+            (f"Score: {self.snake.score}", WHITE, 80),
+            (f"High Score: {self.snake.high_score}", GOLD, 120),
+        ):
+            rendered = self.render_text(fonts.score, text, color)
+            self.screen.blit(rendered, (WIDTH//2 - rendered.get_width()//2, panel_y + offset))
+    
+    def quick_save(self):
+        snapshot.save_file(self.world, QUICKSAVE_PATH)
+        print(f"Game saved to {QUICKSAVE_PATH}")
+    
+    def quick_load(self):
+        try:
+            snapshot.load_file(self.world, QUICKSAVE_PATH)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Could not load {QUICKSAVE_PATH}. Error: {e}")
+            return
+        self.history.clear()
+        self.after_restore()
+    
+    def rewind(self):
+        if self.history.rewind(self.world, REWIND_STEP_TICKS):
+            self.after_restore()
+    
+    def after_restore(self):
+        # The world jumped to another state: rebuild what the renderer keeps
+        # incrementally, and pause so the player can take over again
+        self.snake.refresh_segments()
+        self.snake.grow_effect_active = False
+        self.particles.clear()
+        self.timestep.reset()
+        self.last_drawn_state = None
+        self.freeze_key = None
+        self.state = GameState.PAUSED if self.world.alive else GameState.GAME_OVER
     
     def reset_game(self):
         self.state = GameState.PLAYING
-        self.snake.reset(WIDTH // 2, HEIGHT // 2)
-        self.food.reposition(self.snake.body)
-        self.particles = []
-        self.last_update_time = pygame.time.get_ticks()
+        self.world.reset(self.get_seed())
+        if self.playback is not None:
+            self.playback = Playback(self.playback.replay)
+        self.particles.clear()
+        self.particles.reseed(self.world.seed)
+        self.history.clear()
+        self.last_drawn_state = None  # Repaint the whole window next frame
+        self.freeze_key = None  # Another game may end on the same tick and score
+        self.last_update_time = get_ticks()
+        self.timestep.reset()
+        self.play_time = 0
+
+# Arena controls: the first local player steers with the arrows, the second with WASD
+PLAYER_KEYS = (
+    {pygame.K_UP: "UP", pygame.K_DOWN: "DOWN", pygame.K_LEFT: "LEFT", pygame.K_RIGHT: "RIGHT"},
+    {pygame.K_w: "UP", pygame.K_s: "DOWN", pygame.K_a: "LEFT", pygame.K_d: "RIGHT"},
+)
+PLAYER_COLORS = (GREEN, (0, 160, 255))
+
+class ArenaGame:
+    """Arena mode: local players and bots on one shared board.
+    
+    The board is drawn straight from the arena's owner grid: the block of
+    cells in view becomes a tiny image with one pixel per cell, which one
+    scaled blit turns into the scene, so a frame costs the same with ten
+    snakes or a thousand.
+    """
+    
+    def __init__(self, snakes, players=1, world_size=None, seed=None):
+        self.screen = resources.get_display((WIDTH, HEIGHT), "Ultra Snake 3D - Arena")
+        cols, rows = world_size or (GRID_COLS, GRID_ROWS)
+        self.arena = Arena(cols, rows, snakes, players, seed=seed)
+        self.players = self.arena.snakes[:players]
+        self.camera = Camera(WIDTH, HEIGHT, cols * BLOCK_SIZE, rows * BLOCK_SIZE)
+        self.camera.follow(cols * BLOCK_SIZE // 2, rows * BLOCK_SIZE // 2)
+        self.clock = pygame.time.Clock()
+        self.timestep = engine.FixedTimestep(MAX_CATCH_UP_TICKS)
+        self.paused = False
+        self.text_cache = SurfaceCache(64)
+        self.panel = pygame.Surface((WIDTH, 40), pygame.SRCALPHA)
+        self.panel.fill((0, 0, 0, 150))
+        
+        # Colour of each owner value; black is left see-through
+        self.palette = np.zeros((FOOD + 1, 3), dtype=np.uint8)
+        rng = random.Random(self.arena.seed)
+        for snake in self.arena.snakes:
+            hue = rng.random()
+            self.palette[snake.id] = [int(c * 255) for c in colorsys.hsv_to_rgb(hue, 0.6, 0.8)]
+        for snake, color in zip(self.players, PLAYER_COLORS):
+            self.palette[snake.id] = color
+        self.palette[FOOD] = RED
+    
+    def handle_events(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+            if event.type != pygame.KEYDOWN:
+                continue
+            if event.key in (pygame.K_q, pygame.K_ESCAPE):
+                return False
+            if event.key == pygame.K_p:
+                self.paused = not self.paused
+            elif event.key == pygame.K_r:
+                self.arena.reset(self.arena.seed)
+            for snake, keys in zip(self.players, PLAYER_KEYS):
+                if event.key in keys:
+                    snake.queue_direction(keys[event.key])
+        return True
+    
+    def update(self, elapsed):
+        if self.paused:
+            return
+        self.timestep.advance(elapsed)
+        while self.timestep.next_tick(ARENA_TICK_MS):
+            self.arena.step()
+    
+    def draw(self):
+        arena = self.arena
+        camera = self.camera
+        
+        # Keep the first living player in view
+        for snake in self.players:
+            if snake.alive:
+                head = snake.body[0]
+                camera.follow(
+                    head % arena.cols * BLOCK_SIZE + BLOCK_SIZE//2,
+                    head // arena.cols * BLOCK_SIZE + BLOCK_SIZE//2
+                )
+                break
+        offset_x, offset_y = camera.get_offset()
+        
+        self.screen.fill((15, 15, 15))
+        board = pygame.Rect(offset_x, offset_y, camera.world_width, camera.world_height)
+        self.screen.fill((30, 30, 30), board)
+        pygame.draw.rect(self.screen, (100, 100, 100), board.inflate(2, 2), 1)
+        
+        # Visible cells, coloured by owner, one pixel each
+        x0, y0, x1, y1 = camera.visible_cells(BLOCK_SIZE, margin=0)
+        x0, y0 = max(0, x0), max(0, y0)
+        x1, y1 = min(arena.cols, x1), min(arena.rows, y1)
+        cells = np.frombuffer(arena.owner, dtype=np.uint16).reshape(arena.rows, arena.cols)
+        image = self.palette[cells[y0:y1, x0:x1]]
+        view = pygame.surfarray.make_surface(image.transpose(1, 0, 2))
+        view.set_colorkey(BLACK)
+        view = pygame.transform.scale(view, ((x1 - x0) * BLOCK_SIZE, (y1 - y0) * BLOCK_SIZE))
+        self.screen.blit(view, (x0 * BLOCK_SIZE + offset_x, y0 * BLOCK_SIZE + offset_y))
+        
+        # Outline the local players' heads so they can find themselves
+        for snake in self.players:
+            if snake.alive:
+                head = snake.body[0]
+                rect = (
+                    head % arena.cols * BLOCK_SIZE + offset_x,
+                    head // arena.cols * BLOCK_SIZE + offset_y,
+                    BLOCK_SIZE, BLOCK_SIZE
+                )
+                pygame.draw.rect(self.screen, WHITE, rect, 2)
+        
+        self.draw_hud()
+        if self.paused:
+            text = self.render_text(fonts.menu, "Paused - P to resume", WHITE)
+            self.screen.blit(text, text.get_rect(center=(WIDTH//2, HEIGHT//2)))
+    
+    def render_text(self, font, text, color):
+        return self.text_cache.get((font, text, color), lambda: font.render(text, True, color))
+    
+    def draw_hud(self):
+        self.screen.blit(self.panel, (0, 0))
+        x = 10
+        for i, snake in enumerate(self.players):
+            status = f"Length: {len(snake.body)}" if snake.alive else "Respawning"
+            text = self.render_text(fonts.score, f"P{i + 1} Score: {snake.score}  {status}", PLAYER_COLORS[i])
+            self.screen.blit(text, (x, 5))
+            x += text.get_width() + 30
+        alive = self.render_text(
+            fonts.score, f"Alive: {self.arena.alive_count()}/{len(self.arena.snakes)}", WHITE
+        )
+        self.screen.blit(alive, (WIDTH - alive.get_width() - 10, 5))
+    
+    def run(self):
+        last_time = get_ticks()
+        running = True
+        while running:
+            self.clock.tick(60)
+            running = self.handle_events()
+            current_time = get_ticks()
+            self.update(current_time - last_time)
+            last_time = current_time
+            self.draw()
+            pygame.display.update()
+
+def parse_seed(text):
+    # Seeds are stored as 32-bit unsigned values in replays and snapshots
+    try:
+        seed = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected an integer, not {text!r}") from None
+    if not 0 <= seed <= 0xFFFFFFFF:
+        raise argparse.ArgumentTypeError(f"seed must be between 0 and {0xFFFFFFFF}: {text!r}")
+    return seed
 
 def main():
-    game = Game()
+    parser = argparse.ArgumentParser(description="Ultra Snake 3D")
+    parser.add_argument(
+        "--dirty-rects", action="store_true",
+        help="only repaint the regions that changed each frame"
+    )
+    parser.add_argument("--seed", type=parse_seed, help="play every game with this seed")
+    parser.add_argument("--record", metavar="PATH", help="save a replay of each finished game")
+    parser.add_argument("--replay", metavar="PATH", help="watch a recorded replay")
+    parser.add_argument(
+        "--replay-speed", type=engine.parse_speed, default=1.0,
+        help="playback speed multiplier for --replay"
+    )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="time each frame phase from startup (F3 shows the overlay, F4 saves a trace)"
+    )
+    parser.add_argument("--trace", metavar="PATH", help="write a Chrome trace of the session on exit")
+    parser.add_argument("--player", help="name recorded on the leaderboard (default: login name)")
+    parser.add_argument("--autopilot", action="store_true", help="let the bot play")
+    parser.add_argument(
+        "--world", metavar="COLSxROWS", type=engine.parse_board_size,
+        help="board size in cells, e.g. 500x500 (bigger than the window scrolls)"
+    )
+    parser.add_argument(
+        "--arena", metavar="SNAKES", type=parse_snake_count,
+        help="play an arena with this many snakes (local players plus bots)"
+    )
+    parser.add_argument(
+        "--players", type=int, default=1, choices=(0, 1, 2),
+        help="local players in the arena: arrows, then WASD (default 1)"
+    )
+    parser.add_argument(
+        "--startup-time", action="store_true",
+        help="print the time from launch to the first menu frame, then exit"
+    )
+    args = parser.parse_args()
+    if args.autopilot and args.world is not None and not args.arena:
+        try:
+            board_cycle(*args.world)
+        except ValueError as e:
+            parser.error(f"--autopilot: {e}")
+    
+    if args.arena:
+        ArenaGame(
+            max(args.arena, args.players), players=args.players, world_size=args.world, seed=args.seed
+        ).run()
+        pygame.quit()
+        return
+    
+    replay = Replay.load(args.replay) if args.replay else None
+    game = Game(
+        dirty_rects=args.dirty_rects, seed=args.seed, record_path=args.record,
+        replay=replay, replay_speed=args.replay_speed,
+        profile=args.profile or args.trace is not None, player=args.player,
+        autopilot=args.autopilot, world_size=args.world
+    )
+    profiler = game.profiler
     running = True
+    first_frame = True
     
     while running:
-        game.clock.tick(60)  # Cap framerate at 60 FPS
+        game.wait_for_frame()
+        profiler.begin_frame()
         
         # Handle events
-        running = game.handle_events()
+        with profiler.phase("events"):
+            running = game.handle_events()
         
         # Update game state
-        game.update()
+        with profiler.phase("update"):
+            game.update()
         
         # Draw everything
-        game.draw()
+        with profiler.phase("draw"):
+            game.draw()
+        
+        profiler.end_frame()
+        
+        if first_frame:
+            # The menu is up; load sounds now without holding it back
+            first_frame = False
+            game.sounds.load_async()
+            if args.startup_time:
+                print(f"First menu frame after {get_ticks()} ms")
+                running = False
+    
+    if args.trace:
+        profiler.export_chrome_trace(args.trace)
     
+    game.high_scores.close()  # Write any pending high score before exiting
+    game.leaderboard.close()
     pygame.quit()
 
 if __name__ == "__main__":
@@ -0,0 +1,100 @@
+"""High-score persistence that never blocks the game loop.
+
+save() only records the new value; a background thread coalesces updates
+and writes the file atomically (temp file, fsync, rename) a moment later,
+or straight away after flush(). close() writes anything pending and
+stops the thread, so call it on exit.
+"""
+import os
+import tempfile
+import threading
+import time
+
+HIGH_SCORE_PATH = "highscore.txt"
+WRITE_DELAY = 2.0  # Seconds to wait for more updates before writing
+
+class HighScoreStore:
+    def __init__(self, path=HIGH_SCORE_PATH):
+        self.path = path
+        self.cond = threading.Condition()
+        self.pending = None
+        self.urgent = False
+        self.closing = False
+        self.thread = None
+
+    def load(self):
+        # A missing, empty, partial or corrupt file just means no record
+        try:
+            with open(self.path, "r") as f:
+                return max(0, int(f.read().strip()))
+        except (OSError, ValueError):
+            return 0
+
+    def save(self, score):
+        # Called from the frame path: no disk access here
+        with self.cond:
+            if self.pending is None or score > self.pending:
+                self.pending = score
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="highscore-writer", daemon=True)
+                self.thread.start()
+            self.cond.notify()
+
+    def flush(self):
+        # Ask the writer to write now instead of waiting out the delay
+        # (with nothing pending, a flag left set would skip the next delay)
+        with self.cond:
+            self.urgent = self.pending is not None
+            self.cond.notify()
+
+    def close(self):
+        with self.cond:
+            self.closing = True
+            self.cond.notify()
+            thread = self.thread
+        if thread is not None:
+            thread.join()
+
+    def run(self):
+        with self.cond:
+            while True:
+                while self.pending is None and not self.closing:
+                    self.cond.wait()
+                if self.pending is not None:
+                    # Coalesce a burst of new records into one write: later
+                    # saves wake the thread but do not move the deadline
+                    deadline = time.monotonic() + WRITE_DELAY
+                    while not (self.urgent or self.closing):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self.cond.wait(remaining)
+
+                score, self.pending = self.pending, None
+                self.urgent = False
+                if score is not None:
+                    self.cond.release()
+                    try:
+                        self.write(score)
+                    finally:
+                        self.cond.acquire()
+
+                if self.closing and self.pending is None:
+                    self.thread = None
+                    return
+
+    def write(self, score):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            fd, temp_path = tempfile.mkstemp(prefix=".highscore-", dir=directory)
+            try:
+                with os.fdopen(fd, "w") as f:
+                    f.write(str(score))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        except OSError as e:
+            print(f"Could not save high score. Error: {e}")
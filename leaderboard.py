@@ -0,0 +1,180 @@
+"""Local leaderboard: every finished session, kept in SQLite.
+
+Sessions are queued by record() and inserted by a background thread in
+batched transactions, so the game loop never waits on the database. After
+each batch the thread refreshes a small in-memory snapshot (top scores
+all-time and this week, the player's best) for the menu to read.
+
+The indexes make each query an ordered index scan that stops after N
+rows, however many sessions have been stored. Running this module prints
+the leaderboard:
+
+    python leaderboard.py --limit 20
+"""
+import argparse
+import getpass
+import queue
+import sqlite3
+import threading
+import time
+
+LEADERBOARD_PATH = "leaderboard.db"
+TOP_COUNT = 5  # Rows kept in the in-memory snapshot
+BATCH_SIZE = 256  # Most sessions inserted per transaction
+DEFAULT_PLAYER = "player"  # When there is no login name to use
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    duration_ms INTEGER NOT NULL,
+    ticks INTEGER NOT NULL,
+    seed INTEGER NOT NULL,
+    played_at REAL NOT NULL,
+    week INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_score ON sessions (score DESC);
+CREATE INDEX IF NOT EXISTS sessions_week_score ON sessions (week, score DESC);
+CREATE INDEX IF NOT EXISTS sessions_player_score ON sessions (player, score DESC);
+"""
+
+COLUMNS = "player, score, length, duration_ms, ticks, seed, played_at"
+
+def week_of(timestamp):
+    # ISO year and week as one sortable integer, e.g. 202642
+    return int(time.strftime("%G%V", time.localtime(timestamp)))
+
+def default_player():
+    # getuser raises when neither the environment nor the password
+    # database has a name (e.g. in some containers)
+    try:
+        return getpass.getuser() or DEFAULT_PLAYER
+    except (KeyError, OSError, ImportError):
+        return DEFAULT_PLAYER
+
+def connect(path=LEADERBOARD_PATH):
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+def insert_sessions(connection, sessions):
+    # sessions: (player, score, length, duration_ms, ticks, seed, played_at)
+    with connection:
+        connection.executemany(
+            f"INSERT INTO sessions ({COLUMNS}, week) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [session + (week_of(session[-1]),) for session in sessions],
+        )
+
+def top_scores(connection, limit=10, week=None):
+    """Best sessions all-time, or in one ISO week, highest score first."""
+    if week is None:
+        return connection.execute(
+            f"SELECT {COLUMNS} FROM sessions ORDER BY score DESC LIMIT ?", (limit,)
+        ).fetchall()
+    return connection.execute(
+        f"SELECT {COLUMNS} FROM sessions WHERE week = ? ORDER BY score DESC LIMIT ?", (week, limit)
+    ).fetchall()
+
+def player_best(connection, player):
+    row = connection.execute(
+        "SELECT score FROM sessions WHERE player = ? ORDER BY score DESC LIMIT 1", (player,)
+    ).fetchone()
+    return row[0] if row else 0
+
+class Snapshot:
+    """What the menu shows; replaced wholesale, never mutated."""
+
+    def __init__(self, all_time=(), this_week=(), player_best=0):
+        self.all_time = all_time
+        self.this_week = this_week
+        self.player_best = player_best
+
+    @property
+    def best(self):
+        return self.all_time[0][1] if self.all_time else 0
+
+class Leaderboard:
+    def __init__(self, path=LEADERBOARD_PATH, player=None):
+        self.path = path
+        self.player = player or default_player()
+        self.snapshot = Snapshot()
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="leaderboard-writer", daemon=True)
+        self.thread.start()
+
+    def record(self, score, length, duration_ms, ticks, seed, played_at=None):
+        # Called from the game loop: only queues the row
+        if played_at is None:
+            played_at = time.time()
+        self.queue.put((self.player, score, length, int(duration_ms), ticks, seed, played_at))
+
+    def close(self):
+        # Insert everything still queued, then stop the thread
+        self.queue.put(None)
+        self.thread.join()
+
+    def run(self):
+        try:
+            connection = connect(self.path)
+        except sqlite3.Error as e:
+            print(f"Could not open leaderboard. Error: {e}")
+            connection = None
+        if connection is not None:
+            self.refresh(connection)
+
+        while True:
+            batch = [self.queue.get()]
+            while batch[-1] is not None and len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            closing = batch[-1] is None
+            sessions = [session for session in batch if session is not None]
+
+            if sessions and connection is not None:
+                try:
+                    insert_sessions(connection, sessions)
+                    if closing or self.queue.empty():
+                        self.refresh(connection)
+                except sqlite3.Error as e:
+                    print(f"Could not save session. Error: {e}")
+            if closing:
+                if connection is not None:
+                    connection.close()
+                return
+
+    def refresh(self, connection):
+        self.snapshot = Snapshot(
+            tuple(top_scores(connection, TOP_COUNT)),
+            tuple(top_scores(connection, TOP_COUNT, week_of(time.time()))),
+            player_best(connection, self.player),
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the local leaderboard")
+    parser.add_argument("--path", default=LEADERBOARD_PATH, help="leaderboard database")
+    parser.add_argument("--limit", type=int, default=10, help="rows to show")
+    parser.add_argument("--week", action="store_true", help="only sessions from this week")
+    parser.add_argument("--player", help="also show this player's best")
+    args = parser.parse_args()
+
+    connection = connect(args.path)
+    week = week_of(time.time()) if args.week else None
+    for rank, (player, score, length, duration_ms, ticks, seed, played_at) in enumerate(
+        top_scores(connection, args.limit, week), 1
+    ):
+        played = time.strftime("%Y-%m-%d %H:%M", time.localtime(played_at))
+        print(f"{rank:3d}. {player:16s} {score:6d}  length {length:5d}  "
+              f"{duration_ms / 1000:7.1f}s  {ticks:7d} ticks  seed {seed:<10d} {played}")
+    if args.player:
+        print(f"best for {args.player}: {player_best(connection, args.player)}")
+    connection.close()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,120 @@
+"""Pooled particle system stored as NumPy arrays (structure of arrays).
+
+Particles live in fixed-capacity arrays, with the live ones packed at the
+front. Integration and expiry are vectorized, and drawing is a single
+batched blits() call from pre-rendered circle sprites.
+"""
+import numpy as np
+import pygame
+
+GRAVITY = 0.1
+PARTICLE_LIFE = 30  # Frames
+
+class ParticleSystem:
+    def __init__(self, capacity=1024, rng=None):
+        self.capacity = capacity
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.count = 0
+
+        self.x = np.zeros(capacity, dtype=np.float64)
+        self.y = np.zeros(capacity, dtype=np.float64)
+        self.vel_x = np.zeros(capacity, dtype=np.float64)
+        self.vel_y = np.zeros(capacity, dtype=np.float64)
+        self.radius = np.zeros(capacity, dtype=np.int32)
+        self.color = np.zeros(capacity, dtype=np.int32)  # Index into palette
+        self.life = np.zeros(capacity, dtype=np.int32)
+
+        self.palette = []
+        self.sprites = {}  # (radius, color index) -> circle sprite
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def reseed(self, seed):
+        self.rng = np.random.default_rng(seed)
+
+    def color_index(self, color):
+        color = tuple(color[:3])
+        if color not in self.palette:
+            self.palette.append(color)
+        return self.palette.index(color)
+
+    def emit(self, x, y, color, count=10):
+        # Bursts beyond the pool capacity are dropped rather than grown
+        count = min(count, self.capacity - self.count)
+        if count <= 0:
+            return
+        live = slice(self.count, self.count + count)
+        self.x[live] = x
+        self.y[live] = y
+        self.vel_x[live] = self.rng.uniform(-2, 2, count)
+        self.vel_y[live] = self.rng.uniform(-2, 2, count)
+        self.radius[live] = self.rng.integers(2, 6, count)
+        self.color[live] = self.color_index(color)
+        self.life[live] = PARTICLE_LIFE
+        self.count += count
+
+    def update(self):
+        n = self.count
+        if n == 0:
+            return
+        self.x[:n] += self.vel_x[:n]
+        self.y[:n] += self.vel_y[:n]
+        self.vel_y[:n] += GRAVITY
+        self.life[:n] -= 1
+
+        # Pack the survivors to the front of the pool
+        alive = np.flatnonzero(self.life[:n] > 0)
+        if alive.size != n:
+            for values in (self.x, self.y, self.vel_x, self.vel_y, self.radius, self.color, self.life):
+                values[:alive.size] = values[alive]
+            self.count = alive.size
+
+    def get_sprite(self, radius, color):
+        sprite = self.sprites.get((radius, color))
+        if sprite is None:
+            # Same pixels pygame.draw.circle would produce at this radius
+            size = radius * 2 + 2
+            sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+            pygame.draw.circle(sprite, self.palette[color], (radius + 1, radius + 1), radius)
+            self.sprites[(radius, color)] = sprite
+        return sprite
+
+    def get_rects(self):
+        n = self.count
+        xs = self.x[:n].astype(np.int32)
+        ys = self.y[:n].astype(np.int32)
+        return [
+            pygame.Rect(x - r - 1, y - r - 1, r * 2 + 2, r * 2 + 2)
+            for x, y, r in zip(xs.tolist(), ys.tolist(), self.radius[:n].tolist())
+        ]
+
+    def draw(self, surface, offset=(0, 0)):
+        # Drawing circles straight onto the display ignored alpha, so the
+        # sprites are opaque and particles look the same until they expire.
+        # offset shifts world pixels to the surface, e.g. for a camera
+        n = self.count
+        if n == 0:
+            return
+        radius = self.radius[:n]
+        xs = self.x[:n].astype(np.int32) - radius - 1 + offset[0]
+        ys = self.y[:n].astype(np.int32) - radius - 1 + offset[1]
+        color = self.color[:n]
+
+        # Skip particles entirely outside the surface
+        width, height = surface.get_size()
+        visible = (xs < width) & (ys < height) & (xs + radius * 2 + 2 > 0) & (ys + radius * 2 + 2 > 0)
+        if not visible.all():
+            xs, ys, radius, color = xs[visible], ys[visible], radius[visible], color[visible]
+
+        get_sprite = self.get_sprite
+        surface.blits(
+            [
+                (get_sprite(r, c), (x, y))
+                for x, y, r, c in zip(xs.tolist(), ys.tolist(), radius.tolist(), color.tolist())
+            ],
+            doreturn=False,
+        )
@@ -0,0 +1,267 @@
+"""Optional per-phase frame profiler with an on-screen overlay.
+
+Phases are timed with `with profiler.phase("name"):` blocks; nested phases
+are recorded as "outer/inner". Each frame also counts surface
+allocations. Rolling p50/p95/p99 timings can be shown as an overlay, and
+the recorded frames exported as a Chrome trace (chrome://tracing or
+Perfetto) to attach to stutter reports.
+"""
+import json
+import sys
+import time
+from collections import deque
+
+import pygame
+import pygame.pixelcopy
+
+OVERLAY_REFRESH_FRAMES = 15  # Re-render overlay text four times a second at 60 FPS
+
+# pygame calls that return a new surface, by name -> the module they live
+# in or the class they are a method of
+ALLOCATING_CALLS = {
+    "copy": pygame.Surface,
+    "convert": pygame.Surface,
+    "convert_alpha": pygame.Surface,
+    "render": pygame.font.Font,
+    "scale": pygame.transform,
+    "smoothscale": pygame.transform,
+    "rotate": pygame.transform,
+    "flip": pygame.transform,
+    "rotozoom": pygame.transform,
+    "make_surface": pygame.pixelcopy,  # Behind surfarray.make_surface
+}
+
+_Surface = pygame.Surface
+
+class _CountingSurfaceType(type):
+    # isinstance(x, pygame.Surface) must keep accepting surfaces made
+    # elsewhere (fonts, image loads) while the counting class stands in
+    def __instancecheck__(cls, instance):
+        return isinstance(instance, _Surface)
+
+    def __subclasscheck__(cls, subclass):
+        return issubclass(subclass, _Surface)
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_PHASE = _NullPhase()
+
+class _Phase:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        profiler = self.profiler
+        profiler.stack.append(self.name)
+        self.path = "/".join(profiler.stack)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        profiler = self.profiler
+        profiler.stack.pop()
+        profiler.record(self.path, self.start, end)
+        return False
+
+class FrameProfiler:
+    def __init__(self, enabled=False, history=240, trace_frames=3600):
+        self.enabled = enabled
+        self.always_on = enabled  # Requested at launch, not just for the overlay
+        self.overlay_visible = False
+        self.history = history
+        self.samples = {}  # phase path -> recent durations in ms
+        self.stack = []
+        self.trace = deque(maxlen=trace_frames)  # One list of events per frame
+        self.frame_events = []
+        self.frame_start = 0.0
+        self.origin = time.perf_counter()
+        self.allocations = 0
+        self.allocation_history = deque(maxlen=history)
+        self.hooks_installed = False
+        self.overlay_surface = None
+        self.overlay_font = None
+        self.frames_since_overlay = OVERLAY_REFRESH_FRAMES
+        if enabled:
+            self.install_allocation_hooks()
+
+    def phase(self, name):
+        if not self.enabled:
+            return NULL_PHASE
+        return _Phase(self, name)
+
+    def record(self, path, start, end):
+        duration = (end - start) * 1000
+        samples = self.samples.get(path)
+        if samples is None:
+            samples = self.samples[path] = deque(maxlen=self.history)
+        samples.append(duration)
+        self.frame_events.append((path, start, end))
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame_start = time.perf_counter()
+        self.frame_events = []
+        self.allocations = 0
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        end = time.perf_counter()
+        self.record("frame", self.frame_start, end)
+        self.allocation_history.append(self.allocations)
+        self.trace.append((self.frame_events, self.allocations))
+
+    def install_allocation_hooks(self):
+        # Count Surface construction, by standing a subclass in for
+        # pygame.Surface, and the ALLOCATING_CALLS, through a profile hook
+        # (their C types can't be patched); remove_allocation_hooks puts
+        # both back
+        if self.hooks_installed:
+            return
+        self.hooks_installed = True
+        profiler = self
+
+        class CountingSurface(_Surface, metaclass=_CountingSurfaceType):
+            def __init__(self, *args, **kwargs):
+                profiler.allocations += 1
+                super().__init__(*args, **kwargs)
+
+        pygame.Surface = CountingSurface
+        # Leave an existing profiler (e.g. cProfile) alone; only
+        # construction is counted then
+        if sys.getprofile() is None:
+            sys.setprofile(self.count_call)
+
+    def remove_allocation_hooks(self):
+        if not self.hooks_installed:
+            return
+        self.hooks_installed = False
+        pygame.Surface = _Surface
+        if sys.getprofile() == self.count_call:
+            sys.setprofile(None)
+
+    def count_call(self, frame, event, arg):
+        if event == "c_call":
+            owner = ALLOCATING_CALLS.get(arg.__name__)
+            if owner is not None:
+                bound = getattr(arg, "__self__", None)
+                if bound is owner or (isinstance(owner, type) and isinstance(bound, owner)):
+                    self.allocations += 1
+
+    def percentiles(self, path):
+        samples = sorted(self.samples.get(path, ()))
+        if not samples:
+            return 0.0, 0.0, 0.0
+        last = len(samples) - 1
+        return tuple(samples[int(round(fraction * last))] for fraction in (0.50, 0.95, 0.99))
+
+    def toggle_overlay(self):
+        if self.overlay_visible and not self.always_on:
+            # Profiling was only on for the overlay; the recorded trace
+            # stays available for export
+            self.enabled = False
+            self.remove_allocation_hooks()
+            self.overlay_visible = False
+            self.overlay_surface = None
+            return
+        if not self.enabled:
+            # Start timing from now; this frame began before we were on
+            self.enabled = True
+            self.begin_frame()
+        self.install_allocation_hooks()
+        self.overlay_visible = not self.overlay_visible
+        self.frames_since_overlay = OVERLAY_REFRESH_FRAMES
+
+    def create_overlay(self):
+        if self.overlay_font is None:
+            # F3 can arrive before anything else has needed a font
+            if not pygame.font.get_init():
+                pygame.font.init()
+            self.overlay_font = pygame.font.Font(None, 18)
+        font = self.overlay_font
+
+        # Proportional font, so each column is rendered and placed separately
+        rows = [("phase", "p50", "p95", "p99 ms")]
+        for path in sorted(self.samples, key=lambda p: (p != "frame", p)):
+            rows.append((path,) + tuple(f"{value:.2f}" for value in self.percentiles(path)))
+        footer = None
+        if self.allocation_history:
+            average = sum(self.allocation_history) / len(self.allocation_history)
+            footer = f"surface allocs/frame {average:.1f} (max {max(self.allocation_history)})"
+
+        color = (220, 220, 220)
+        rendered = [[font.render(cell, True, color) for cell in row] for row in rows]
+        name_width = max(row[0].get_width() for row in rendered) + 10
+        column_width = max(cell.get_width() for row in rendered for cell in row[1:]) + 10
+        width = name_width + column_width * 3 + 12
+        footer_surface = font.render(footer, True, color) if footer else None
+        if footer_surface is not None:
+            width = max(width, footer_surface.get_width() + 12)
+        height = (len(rendered) + (1 if footer_surface else 0)) * 16 + 8
+
+        overlay = pygame.Surface((width, height), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 190))
+        for i, row in enumerate(rendered):
+            y = 4 + i * 16
+            overlay.blit(row[0], (6, y))
+            for column, cell in enumerate(row[1:]):
+                right = 6 + name_width + column_width * (column + 1)
+                overlay.blit(cell, (right - cell.get_width(), y))
+        if footer_surface is not None:
+            overlay.blit(footer_surface, (6, 4 + len(rendered) * 16))
+        return overlay
+
+    def get_overlay_rect(self, surface):
+        # Where the overlay sits (bottom-left), for dirty-rect renderers
+        if not self.overlay_visible or self.overlay_surface is None:
+            return None
+        rect = self.overlay_surface.get_rect()
+        rect.bottomleft = (0, surface.get_height())
+        return rect
+
+    def update_overlay(self):
+        # Called once per frame; the text is only re-rendered periodically
+        if not self.overlay_visible:
+            return
+        self.frames_since_overlay += 1
+        if self.overlay_surface is None or self.frames_since_overlay >= OVERLAY_REFRESH_FRAMES:
+            self.overlay_surface = self.create_overlay()
+            self.frames_since_overlay = 0
+
+    def draw_overlay(self, surface):
+        if not self.overlay_visible or self.overlay_surface is None:
+            return None
+        return surface.blit(self.overlay_surface, self.get_overlay_rect(surface))
+
+    def export_chrome_trace(self, path):
+        """Write the recorded frames in Chrome trace-event JSON format."""
+        events = []
+        for frame_events, allocations in self.trace:
+            for name, start, end in frame_events:
+                events.append({
+                    "name": name.rsplit("/", 1)[-1],
+                    "cat": name,
+                    "ph": "X",
+                    "ts": (start - self.origin) * 1e6,
+                    "dur": (end - start) * 1e6,
+                    "pid": 1,
+                    "tid": 1,
+                })
+            if frame_events:
+                events.append({
+                    "name": "surface allocations",
+                    "ph": "C",
+                    "ts": (frame_events[-1][2] - self.origin) * 1e6,
+                    "pid": 1,
+                    "args": {"surfaces": allocations},
+                })
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
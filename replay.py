@@ -0,0 +1,137 @@
+"""Compact binary replays: a seed plus the tick of every direction change.
+
+Because engine.World draws all randomness from its seeded RNG, re-running
+the recorded turns on a fresh world reproduces the game exactly. Running
+this module re-simulates a replay headlessly as fast as the CPU allows:
+
+    python replay.py game.replay
+"""
+import argparse
+import struct
+import time
+
+import engine
+from engine import DIRECTION_NAMES
+
+MAGIC = b"SNKR"
+VERSION = 1
+
+# magic, version, cols, rows, seed, total ticks, final score, event count
+HEADER = struct.Struct("<4sBHHIIII")
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def read_varint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+class Replay:
+    def __init__(self, seed, cols=engine.GRID_COLS, rows=engine.GRID_ROWS, events=None, ticks=0, score=0):
+        self.seed = seed
+        self.cols = cols
+        self.rows = rows
+        self.events = events if events is not None else []  # (tick, direction)
+        self.ticks = ticks
+        self.score = score
+
+    @classmethod
+    def from_world(cls, world):
+        return cls(world.seed, world.cols, world.rows, list(world.inputs), world.ticks, world.snake.score)
+
+    def to_bytes(self):
+        # Each event is one varint: ticks since the previous event, shifted
+        # left two bits to make room for the direction code
+        body = bytearray()
+        previous = 0
+        for tick, direction in self.events:
+            write_varint(body, (tick - previous) << 2 | DIRECTION_NAMES.index(direction))
+            previous = tick
+        header = HEADER.pack(
+            MAGIC, VERSION, self.cols, self.rows, self.seed,
+            self.ticks, self.score, len(self.events)
+        )
+        return header + bytes(body)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, cols, rows, seed, ticks, score, count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("not a replay file")
+        if version != VERSION:
+            raise ValueError(f"unsupported replay version {version}")
+
+        events = []
+        offset = HEADER.size
+        tick = 0
+        for _ in range(count):
+            value, offset = read_varint(data, offset)
+            tick += value >> 2
+            events.append((tick, DIRECTION_NAMES[value & 3]))
+        return cls(seed, cols, rows, events, ticks, score)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+class Playback:
+    """Feeds a replay's turns back to a world, one tick at a time."""
+
+    def __init__(self, replay):
+        self.replay = replay
+        self.index = 0
+
+    def direction_at(self, tick):
+        # Recorded turn for this tick, or None to keep going straight
+        events = self.replay.events
+        if self.index < len(events) and events[self.index][0] == tick:
+            self.index += 1
+            return events[self.index - 1][1]
+        return None
+
+    def finished(self, tick):
+        return tick >= self.replay.ticks
+
+def simulate(replay, world=None):
+    """Re-run a replay headlessly on world (a new World if None) and return it."""
+    if world is None:
+        world = engine.World(replay.cols, replay.rows)
+    world.reset(replay.seed)
+    playback = Playback(replay)
+    while world.alive and not playback.finished(world.ticks):
+        world.step(playback.direction_at(world.ticks))
+    return world
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-simulate a replay headlessly")
+    parser.add_argument("path", help="replay file to play back")
+    args = parser.parse_args()
+
+    replay = Replay.load(args.path)
+    start = time.perf_counter()
+    world = simulate(replay)
+    elapsed = time.perf_counter() - start
+
+    matches = world.ticks == replay.ticks and world.snake.score == replay.score
+    print(f"seed {replay.seed}: {world.ticks} ticks, score {world.snake.score} "
+          f"({'matches' if matches else 'DOES NOT match'} recording)")
+    print(f"simulated in {elapsed * 1000:.1f} ms ({world.ticks / max(elapsed, 1e-9):,.0f} ticks/s)")
+    return 0 if matches else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,127 @@
+"""Lazily initialised pygame subsystems: window, fonts and sounds.
+
+Nothing here touches SDL at import time. The window opens on the first
+get_display() call, fonts are resolved the first time they are used, and
+sounds load on a background thread so the menu can show before the audio
+device is ready.
+
+pygame.font.SysFont scans every installed font each launch. FontCache
+instead remembers the file each font name resolved to in a small JSON
+file, so only the very first launch pays for the scan.
+"""
+import json
+import os
+import threading
+import time
+
+import pygame
+
+FONT_CACHE_PATH = "fontcache.json"
+
+LAUNCH_TIME = time.perf_counter()
+
+def get_ticks():
+    # Milliseconds since launch, like pygame.time.get_ticks() but without
+    # needing pygame.init(), which would also open the audio device
+    return int((time.perf_counter() - LAUNCH_TIME) * 1000)
+
+_display = None
+
+def get_display(size, caption):
+    global _display
+    if _display is None:
+        pygame.display.init()
+        _display = pygame.display.set_mode(size)
+        pygame.display.set_caption(caption)
+    return _display
+
+class FontCache:
+    """Fonts by role, e.g. fonts.title, created on first use.
+
+    specs maps each role to (system font name, size, fallback size); the
+    fallback size is used with pygame's default font if loading fails.
+    """
+
+    def __init__(self, specs, cache_path=FONT_CACHE_PATH):
+        self.specs = specs
+        self.cache_path = cache_path
+        self.paths = None  # Font name -> file path (None: not installed)
+        self.fonts = {}  # (path, size) -> Font
+
+    def __getattr__(self, role):
+        try:
+            name, size, fallback_size = self.specs[role]
+        except KeyError:
+            raise AttributeError(role) from None
+        font = self.load(name, size, fallback_size)
+        setattr(self, role, font)
+        return font
+
+    def load_paths(self):
+        try:
+            with open(self.cache_path, "r") as f:
+                paths = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Drop entries whose files have since been removed
+        return {
+            name: path for name, path in paths.items()
+            if path is None or os.path.exists(path)
+        }
+
+    def save_paths(self):
+        try:
+            with open(self.cache_path, "w") as f:
+                json.dump(self.paths, f, indent=1)
+        except OSError:
+            pass  # Next launch just scans again
+
+    def resolve(self, name):
+        if self.paths is None:
+            self.paths = self.load_paths()
+        if name not in self.paths:
+            self.paths[name] = pygame.font.match_font(name)  # The slow scan
+            self.save_paths()
+        return self.paths[name]
+
+    def load(self, name, size, fallback_size):
+        if not pygame.font.get_init():
+            pygame.font.init()
+        try:
+            key = (self.resolve(name), size)
+            font = self.fonts.get(key)
+            if font is None:
+                font = self.fonts[key] = pygame.font.Font(*key)
+            return font
+        except Exception:
+            # Fallback to default font if specific fonts not available
+            return pygame.font.Font(None, fallback_size)
+
+class SoundBank:
+    """Named sounds loaded off the main thread; play() is a no-op until ready."""
+
+    def __init__(self, paths):
+        self.paths = paths
+        self.sounds = {}
+        self.thread = None
+
+    def load_async(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.load, name="sound-loader", daemon=True)
+            self.thread.start()
+
+    def load(self):
+        try:
+            # Initialize the mixer
+            pygame.mixer.init()
+
+            # Load sounds from the assets folder
+            self.sounds = {name: pygame.mixer.Sound(path) for name, path in self.paths.items()}
+            print("Sound effects loaded successfully.")
+        except Exception as e:
+            print(f"Could not load sound effects. Error: {e}")
+
+    def play(self, name):
+        sound = self.sounds.get(name)
+        if sound is not None:
+            sound.play()
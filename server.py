@@ -0,0 +1,456 @@
+"""Authoritative asyncio server for networked arena matches.
+
+The server owns one arena.Arena and runs its ticks; clients only send
+turns. Each connection takes over one of the arena's bot snakes (and
+hands it back on leaving), so a match is always full. After a one-off
+full state, clients get a delta per tick: spawns, one byte per moving
+head (direction and whether the tail moved), deaths and new food. Eaten
+food is implied by a head landing on it. A delta is encoded once and
+the same bytes go to every client.
+
+Every message is framed as a little-endian u32 length and a payload
+whose first byte is its type. Each client has a bounded queue of
+pending frames; a client too slow to keep up has its backlog dropped
+and gets a fresh full state once it catches up, so a stalled reader
+never holds up the match or grows the server's memory.
+
+    python server.py --port 7777 --slots 100
+    python server.py --selftest 200 --tick-rate 60  # Loopback clients check their copies
+"""
+import argparse
+import asyncio
+import random
+import socket
+import struct
+import time
+from array import array
+from collections import deque
+
+import engine
+from arena import FOOD, Arena, parse_snake_count
+from engine import DIRECTION_NAMES
+from snapshot import pack_array, unpack_array
+
+MAGIC = b"SNKN"
+VERSION = 1
+
+# Message types
+WELCOME = 1
+FULL = 2
+DELTA = 3
+REJECT = 4  # Match full
+TURN = 16  # Client to server
+
+FRAME = struct.Struct("<I")
+# type, magic, version, cols, rows, your snake id, tick rate
+WELCOME_MESSAGE = struct.Struct("<B4sBHHHH")
+# type, tick, snakes, food cells
+FULL_HEADER = struct.Struct("<BIHI")
+# id, alive, direction, length
+FULL_SNAKE = struct.Struct("<HBBI")
+# type, tick, spawns, moves, deaths, food
+DELTA_HEADER = struct.Struct("<BIHHHI")
+TURN_MESSAGE = struct.Struct("<BB")
+
+MAX_QUEUED_FRAMES = 32  # Per client; past this it is resynced with a full state
+SEND_BUFFER = 16 * 1024  # Per-connection socket and transport buffering
+MAX_CLIENT_FRAME = 64  # Clients only ever send tiny messages
+MAX_CATCH_UP_TICKS = 5  # Ticks run back to back after a stall
+LISTEN_BACKLOG = 1024  # Pending connections, for hundreds of clients joining at once
+
+def frame(payload):
+    return FRAME.pack(len(payload)) + payload
+
+async def read_frame(reader, limit=None):
+    (length,) = FRAME.unpack(await reader.readexactly(FRAME.size))
+    if limit is not None and length > limit:
+        raise ValueError(f"frame of {length} bytes is too large")
+    return await reader.readexactly(length)
+
+def encode_delta(tick, log):
+    moves = log.moves
+    parts = [
+        DELTA_HEADER.pack(DELTA, tick, len(log.spawns), len(moves), len(log.deaths), len(log.food)),
+        pack_array(array("H", [snake_id for snake_id, cell in log.spawns])),
+        pack_array(array("I", [cell for snake_id, cell in log.spawns])),
+        pack_array(array("H", [snake_id for snake_id, direction, tail_left in moves])),
+        bytes(
+            DIRECTION_NAMES.index(direction) | tail_left << 2
+            for snake_id, direction, tail_left in moves
+        ),
+        pack_array(array("H", log.deaths)),
+        pack_array(array("I", log.food)),
+    ]
+    return frame(b"".join(parts))
+
+def encode_full(arena):
+    parts = [FULL_HEADER.pack(FULL, arena.ticks, len(arena.snakes), len(arena.food))]
+    for snake in arena.snakes:
+        parts.append(FULL_SNAKE.pack(
+            snake.id, snake.alive, DIRECTION_NAMES.index(snake.direction), len(snake.body)
+        ))
+        parts.append(pack_array(array("I", snake.body)))
+    parts.append(pack_array(array("I", arena.food.cells)))
+    return frame(b"".join(parts))
+
+class MatchMirror:
+    """A client's copy of the match, kept up to date from server frames."""
+
+    def __init__(self):
+        self.cols = self.rows = 0
+        self.snake_id = None
+        self.tick_rate = 0
+        self.tick = 0
+        self.bodies = {}  # Snake id -> deque of cells, head on the left
+        self.directions = {}
+        self.food = set()
+        self.synced = False  # Deltas only apply on top of a full state
+
+    def apply(self, payload):
+        kind = payload[0]
+        if kind == WELCOME:
+            _, magic, version, self.cols, self.rows, self.snake_id, self.tick_rate = (
+                WELCOME_MESSAGE.unpack_from(payload)
+            )
+            if magic != MAGIC or version != VERSION:
+                raise ValueError("not a compatible arena server")
+        elif kind == FULL:
+            self.apply_full(payload)
+        elif kind == DELTA:
+            self.apply_delta(payload)
+        elif kind == REJECT:
+            raise ConnectionError("match is full")
+        else:
+            raise ValueError(f"unknown message type {kind}")
+
+    def apply_full(self, payload):
+        _, self.tick, snake_count, food_count = FULL_HEADER.unpack_from(payload)
+        offset = FULL_HEADER.size
+        self.bodies = {}
+        self.directions = {}
+        for _ in range(snake_count):
+            snake_id, alive, direction, length = FULL_SNAKE.unpack_from(payload, offset)
+            body, offset = unpack_array(payload, offset + FULL_SNAKE.size, length, "I")
+            if alive:
+                self.bodies[snake_id] = deque(body)
+                self.directions[snake_id] = DIRECTION_NAMES[direction]
+        food, offset = unpack_array(payload, offset, food_count, "I")
+        self.food = set(food)
+        self.synced = True
+
+    def apply_delta(self, payload):
+        _, tick, spawns, moves, deaths, food = DELTA_HEADER.unpack_from(payload)
+        if not self.synced:
+            return
+        offset = DELTA_HEADER.size
+        spawn_ids, offset = unpack_array(payload, offset, spawns, "H")
+        spawn_cells, offset = unpack_array(payload, offset, spawns, "I")
+        move_ids, offset = unpack_array(payload, offset, moves, "H")
+        move_codes = payload[offset:offset + moves]
+        offset += moves
+        death_ids, offset = unpack_array(payload, offset, deaths, "H")
+        food_cells, offset = unpack_array(payload, offset, food, "I")
+
+        for snake_id, cell in zip(spawn_ids, spawn_cells):
+            self.bodies[snake_id] = deque([cell])
+        cols = self.cols
+        for snake_id, code in zip(move_ids, move_codes):
+            body = self.bodies[snake_id]
+            direction = DIRECTION_NAMES[code & 3]
+            dx, dy = engine.DIRECTIONS[direction]
+            head = body[0] + dy * cols + dx
+            if code & 4:
+                body.pop()
+            body.appendleft(head)
+            self.directions[snake_id] = direction
+            self.food.discard(head)
+        for snake_id in death_ids:
+            del self.bodies[snake_id]
+            self.directions.pop(snake_id, None)
+        self.food.update(food_cells)
+        self.tick = tick
+
+    def owner_grid(self):
+        # Same layout as Arena.owner, for checking a copy against the server
+        grid = array("H", bytes(2 * self.cols * self.rows))
+        for snake_id, body in self.bodies.items():
+            for cell in body:
+                grid[cell] = snake_id
+        for cell in self.food:
+            grid[cell] = FOOD
+        return grid
+
+class Client:
+    """One connection: the snake it steers and the frames waiting to go out."""
+
+    def __init__(self, writer, snake):
+        self.writer = writer
+        self.snake = snake
+        self.frames = deque()
+        self.pending = asyncio.Event()
+        self.resync = True  # Send a full state before any more deltas
+        self.resyncs = 0
+        self.bytes_sent = 0
+
+    def send(self, data):
+        if self.resync:
+            return
+        if len(self.frames) >= MAX_QUEUED_FRAMES:
+            # Too far behind: drop the backlog and catch up in one go
+            self.frames.clear()
+            self.resync = True
+            self.resyncs += 1
+        else:
+            self.frames.append(data)
+        self.pending.set()
+
+class MatchServer:
+    def __init__(self, cols=100, rows=100, slots=100, tick_rate=engine.FPS, seed=None):
+        # Every slot starts as a bot; clients take them over as they join
+        self.arena = Arena(cols, rows, slots, seed=seed, log=True)
+        self.tick_rate = tick_rate
+        self.clients = set()
+        self.handlers = set()  # Connection tasks, awaited by stop()
+        # For reporting
+        self.tick_time = 0.0  # Seconds spent in tick()
+        self.sessions = 0
+        self.bytes_sent = 0  # By clients that have left
+        self.resyncs = 0
+        self.server = None
+        self.ticker = None
+
+    async def start(self, host="127.0.0.1", port=0):
+        self.server = await asyncio.start_server(self.handle, host, port, backlog=LISTEN_BACKLOG)
+        self.ticker = asyncio.create_task(self.run_ticks())
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        # Closing a connection ends its handler normally (a cancelled one
+        # is logged as an error by asyncio's stream callback), and waiting
+        # for them leaves nothing pending when the event loop shuts down
+        self.ticker.cancel()
+        self.server.close()
+        for client in list(self.clients):
+            client.writer.close()
+        await asyncio.gather(self.ticker, *self.handlers, return_exceptions=True)
+        await self.server.wait_closed()
+
+    def totals(self):
+        # Sessions, bytes sent and slow-client resyncs so far
+        clients = list(self.clients)
+        return (
+            self.sessions,
+            self.bytes_sent + sum(client.bytes_sent for client in clients),
+            self.resyncs + sum(client.resyncs for client in clients),
+        )
+
+    def claim_snake(self):
+        taken = {client.snake for client in self.clients}
+        for snake in self.arena.snakes:
+            if snake not in taken:
+                return snake
+        return None
+
+    async def run_ticks(self):
+        loop = asyncio.get_running_loop()
+        interval = 1 / self.tick_rate
+        next_tick = loop.time()
+        while True:
+            next_tick += interval
+            delay = next_tick - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif -delay > interval * MAX_CATCH_UP_TICKS:
+                next_tick = loop.time()  # Drop the backlog after a stall
+            self.tick()
+
+    def tick(self):
+        start = time.perf_counter()
+        self.arena.step()
+        data = encode_delta(self.arena.ticks, self.arena.log)
+        self.arena.log.clear()
+        for client in self.clients:
+            client.send(data)
+        self.tick_time += time.perf_counter() - start
+
+    async def handle(self, reader, writer):
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            # Small buffers, so a lagging client shows up as backpressure
+            # here rather than as seconds of stale state queued in the kernel
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        writer.transport.set_write_buffer_limits(high=SEND_BUFFER)
+
+        snake = self.claim_snake()
+        if snake is None:
+            writer.write(frame(bytes([REJECT])))
+            writer.close()
+            return
+        snake.bot = False
+        snake.input_queue.clear()
+        client = Client(writer, snake)
+        self.clients.add(client)
+        handler = asyncio.current_task()
+        self.handlers.add(handler)
+        self.sessions += 1
+        writer.write(frame(WELCOME_MESSAGE.pack(
+            WELCOME, MAGIC, VERSION, self.arena.cols, self.arena.rows, snake.id, self.tick_rate
+        )))
+        client.pending.set()
+        sender = asyncio.create_task(self.write_frames(client))
+        try:
+            while True:
+                payload = await read_frame(reader, MAX_CLIENT_FRAME)
+                if len(payload) == TURN_MESSAGE.size and payload[0] == TURN and payload[1] < 4:
+                    snake.queue_direction(DIRECTION_NAMES[payload[1]])
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass  # Disconnected, or sent garbage
+        finally:
+            self.clients.discard(client)
+            self.bytes_sent += client.bytes_sent
+            self.resyncs += client.resyncs
+            snake.bot = True  # Its snake plays on as a bot
+            sender.cancel()
+            writer.close()
+            await asyncio.gather(sender, return_exceptions=True)
+            self.handlers.discard(handler)
+
+    async def write_frames(self, client):
+        writer = client.writer
+        try:
+            while True:
+                await client.pending.wait()
+                client.pending.clear()
+                if client.resync:
+                    # Everything queued is covered by the current state
+                    client.resync = False
+                    client.frames.clear()
+                    data = encode_full(self.arena)
+                    writer.write(data)
+                    client.bytes_sent += len(data)
+                while client.frames:
+                    data = client.frames.popleft()
+                    writer.write(data)
+                    client.bytes_sent += len(data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+
+async def connect(host, port, receive_buffer=None):
+    """Open a client connection; receive_buffer shrinks the socket's
+    receive buffer (used to simulate slow clients)."""
+    if receive_buffer is None:
+        return await asyncio.open_connection(host, port)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer)
+    sock.setblocking(False)
+    await asyncio.get_running_loop().sock_connect(sock, (host, port))
+    return await asyncio.open_connection(sock=sock)
+
+def send_turn(writer, direction):
+    writer.write(frame(TURN_MESSAGE.pack(TURN, DIRECTION_NAMES.index(direction))))
+
+async def selftest(clients, seconds, slow_clients, cols, rows, tick_rate, seed):
+    # Loopback clients steer at random and keep mirrors of the match;
+    # at the end every mirror must equal the server's own state
+    server = MatchServer(cols, rows, max(clients, 1) + 10, tick_rate, seed)
+    port = await server.start()
+    rng = random.Random(seed)
+    loop = asyncio.get_running_loop()
+    mirrors = []
+    stop = asyncio.Event()
+
+    async def play(index):
+        slow = index < slow_clients
+        reader, writer = await connect("127.0.0.1", port, 4096 if slow else None)
+        mirror = MatchMirror()
+        mirrors.append(mirror)
+        stalled = False
+        try:
+            while True:
+                payload = await read_frame(reader)
+                mirror.apply(payload)
+                if mirror.snake_id in mirror.bodies and rng.random() < 0.05:
+                    send_turn(writer, rng.choice(DIRECTION_NAMES))
+                if slow and not stalled and mirror.tick > tick_rate:
+                    # Stop reading, as a frozen client would, until the
+                    # server gives up on our backlog (or the test ends)
+                    stalled = True
+                    client = next(c for c in server.clients if c.snake.id == mirror.snake_id)
+                    give_up = loop.time() + seconds
+                    writer.transport.pause_reading()
+                    while client.resyncs == 0 and loop.time() < give_up:
+                        await asyncio.sleep(0.05)
+                    writer.transport.resume_reading()
+                if stop.is_set() and mirror.tick == server.arena.ticks:
+                    return
+        finally:
+            writer.close()
+
+    tasks = [asyncio.create_task(play(i)) for i in range(clients)]
+    await asyncio.sleep(seconds)
+    # Freeze the match after one last tick, which every client waits for
+    server.ticker.cancel()
+    stop.set()
+    server.tick()
+    await asyncio.wait_for(asyncio.gather(*tasks), timeout=30)
+
+    expected = server.arena.owner
+    mismatched = sum(mirror.owner_grid() != expected for mirror in mirrors)
+    ticks = server.arena.ticks
+    sessions, sent, resyncs = server.totals()
+    print(f"{sessions} clients, {ticks} ticks at {tick_rate}/s on {cols}x{rows}, "
+          f"tick cost {server.tick_time / max(ticks, 1) * 1000:.2f} ms")
+    print(f"{sent / max(sessions, 1) / max(ticks, 1):.0f} bytes per client per tick, "
+          f"{resyncs} resyncs of slow clients")
+    print(f"{len(mirrors) - mismatched}/{len(mirrors)} client copies match the server")
+    await server.stop()
+    return 0 if mismatched == 0 else 1
+
+def parse_tick_rate(text):
+    # Sent to clients as an unsigned 16-bit field of the welcome message
+    try:
+        rate = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected an integer, not {text!r}") from None
+    if not 0 < rate <= 0xFFFF:
+        raise argparse.ArgumentTypeError(f"tick rate must be between 1 and {0xFFFF}: {text!r}")
+    return rate
+
+async def serve(host, port, slots, cols, rows, tick_rate, seed):
+    server = MatchServer(cols, rows, slots, tick_rate, seed)
+    port = await server.start(host, port)
+    print(f"Arena server on {host}:{port} ({slots} slots, {cols}x{rows})")
+    await server.server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Host networked arena matches")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument("--slots", type=parse_snake_count, default=100, help="snakes in the match (bots fill empty slots)")
+    parser.add_argument("--cols", type=int, default=100)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--tick-rate", type=parse_tick_rate, default=engine.FPS, help="ticks per second")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument(
+        "--selftest", metavar="CLIENTS", type=int,
+        help="run a match with this many loopback clients and check their copies"
+    )
+    parser.add_argument("--seconds", type=float, default=10.0, help="length of the self-test")
+    parser.add_argument("--slow-clients", type=int, default=2, help="self-test clients that stall reading")
+    args = parser.parse_args()
+
+    if args.selftest is not None:
+        return asyncio.run(selftest(
+            args.selftest, args.seconds, args.slow_clients, args.cols, args.rows,
+            args.tick_rate, args.seed if args.seed is not None else 0
+        ))
+    try:
+        asyncio.run(serve(args.host, args.port, args.slots, args.cols, args.rows, args.tick_rate, args.seed))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,271 @@
+"""Compact binary snapshots of an engine.World.
+
+A snapshot holds everything the simulation needs to carry on exactly where
+it left off: the body packed as flat cell indices, the occupancy grid and
+its free-cell index (whose order decides where food spawns next),
+direction and queued turns, speed, score and growth timers, food, and the
+RNG state. Restoring one into any World of the same board size resumes
+the identical game, which gives quick-save/resume and cheap clones for
+lookahead search (rewind uses History's per-tick undo records instead):
+
+    data = snapshot.save(world)
+    snapshot.restore(world, data)
+
+The grid arrays are stored as raw bytes, so apart from the body a save or
+restore is a handful of memory copies. For lookahead search, restore into
+one scratch World rather than building a new one each time.
+"""
+import struct
+import sys
+from array import array
+from collections import deque
+from itertools import islice
+
+import engine
+from engine import DIRECTION_NAMES
+from replay import read_varint, write_varint
+
+MAGIC = b"SNKS"
+VERSION = 1
+
+# Flag bits
+ALIVE = 1
+WON = 2
+HIT_SELF = 4
+HAS_VACATED = 8
+HAS_GAUSS = 16
+HAS_INPUTS = 32
+
+# magic, version, flags, cols, rows, seed, ticks, direction, last direction,
+# score, length, speed, growth pending, head x/y, vacated x/y, food x/y,
+# body cells after the head, free cells, queued turns, logged inputs
+HEADER = struct.Struct("<4sBBHHIIBBIIdHhhhhhhIIBI")
+
+RNG_WORDS = 625  # Mersenne Twister state plus its position
+RNG = struct.Struct(f"<{RNG_WORDS}Id")
+
+def pack_array(values):
+    # Little-endian raw bytes of an array
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def unpack_array(data, offset, count, typecode):
+    values = array(typecode)
+    end = offset + count * values.itemsize
+    values.frombytes(data[offset:end])
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values, end
+
+def save(world, inputs=True):
+    """Pack world into bytes; inputs=False leaves out the turn log."""
+    snake, grid = world.snake, world.snake.grid
+    version, state, gauss = world.rng.getstate()
+
+    flags = (ALIVE if world.alive else 0) | (WON if world.won else 0)
+    flags |= HIT_SELF if snake.hit_self else 0
+    flags |= HAS_VACATED if snake.vacated is not None else 0
+    flags |= HAS_GAUSS if gauss is not None else 0
+    flags |= HAS_INPUTS if inputs else 0
+    vacated = snake.vacated or (0, 0)
+    cols = world.cols
+    body = array(grid.typecode, [y * cols + x for x, y in islice(snake.body, 1, None)])
+
+    header = HEADER.pack(
+        MAGIC, VERSION, flags, world.cols, world.rows, world.seed, world.ticks,
+        DIRECTION_NAMES.index(snake.direction), DIRECTION_NAMES.index(world.last_direction),
+        snake.score, snake.length, snake.speed, snake.growth_pending,
+        snake.head[0], snake.head[1], vacated[0], vacated[1],
+        world.food.position[0], world.food.position[1],
+        len(body), len(grid.free), len(snake.input_queue),
+        len(world.inputs) if inputs else 0,
+    )
+    parts = [
+        header,
+        RNG.pack(*state, gauss or 0.0),
+        pack_array(body),
+        bytes(grid.occupied),
+        pack_array(grid.free),
+        pack_array(grid.slot),
+        bytes(DIRECTION_NAMES.index(d) for d in snake.input_queue),
+    ]
+    if inputs:
+        log = bytearray()
+        previous = 0
+        for tick, direction in world.inputs:
+            write_varint(log, (tick - previous) << 2 | DIRECTION_NAMES.index(direction))
+            previous = tick
+        parts.append(bytes(log))
+    return b"".join(parts)
+
+def restore(world, data):
+    """Overwrite world (same board size) with the state packed in data.
+
+    A snapshot saved without inputs leaves world.inputs untouched.
+    """
+    (magic, version, flags, cols, rows, seed, ticks, direction, last_direction,
+     score, length, speed, growth_pending, head_x, head_y, vacated_x, vacated_y,
+     food_x, food_y, body_count, free_count, queue_count, input_count) = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a snapshot")
+    if version != VERSION:
+        raise ValueError(f"unsupported snapshot version {version}")
+    if (cols, rows) != (world.cols, world.rows):
+        raise ValueError(f"snapshot is for a {cols}x{rows} board, not {world.cols}x{world.rows}")
+
+    offset = HEADER.size
+    rng = RNG.unpack_from(data, offset)
+    offset += RNG.size
+    world.rng.setstate((3, rng[:RNG_WORDS], rng[RNG_WORDS] if flags & HAS_GAUSS else None))
+
+    snake = world.snake
+    grid = snake.grid
+    body, offset = unpack_array(data, offset, body_count, grid.typecode)
+    grid.occupied = bytearray(data[offset:offset + grid.size])
+    offset += grid.size
+    grid.free, offset = unpack_array(data, offset, free_count, grid.typecode)
+    grid.slot, offset = unpack_array(data, offset, grid.size, grid.typecode)
+    queue = data[offset:offset + queue_count]
+    offset += queue_count
+
+    snake.head = [head_x, head_y]
+    snake.body = deque([[index % cols, index // cols] for index in body])
+    snake.body.appendleft([head_x, head_y])
+    snake.direction = DIRECTION_NAMES[direction]
+    snake.input_queue = deque(DIRECTION_NAMES[code] for code in queue)
+    snake.length = length
+    snake.speed = speed
+    snake.score = score
+    snake.growth_pending = growth_pending
+    snake.vacated = [vacated_x, vacated_y] if flags & HAS_VACATED else None
+    snake.hit_self = bool(flags & HIT_SELF)
+
+    world.food.position = [food_x, food_y]
+    world.food.rng = world.rng
+    world.seed = seed
+    world.ticks = ticks
+    world.alive = bool(flags & ALIVE)
+    world.won = bool(flags & WON)
+    world.last_direction = DIRECTION_NAMES[last_direction]
+
+    if flags & HAS_INPUTS:
+        inputs = []
+        tick = 0
+        for _ in range(input_count):
+            value, offset = read_varint(data, offset)
+            tick += value >> 2
+            inputs.append((tick, DIRECTION_NAMES[value & 3]))
+        world.inputs = inputs
+    return world
+
+def clone(world):
+    """A new engine.World in the same state, for lookahead search."""
+    copy = engine.World(world.cols, world.rows, seed=0)
+    return restore(copy, save(world))
+
+class History:
+    """Rolling per-tick undo records for instant rewind.
+
+    step() notes what a tick is about to change before running it: the
+    snake's scalars, its tail and the tail's free-list slot, and the RNG
+    state when the food is in reach. Undoing a tick takes the head off,
+    puts the tail back and reverses the grid's free-list updates, so both
+    cost the same on any board size and rewinding restores the exact
+    state, free-cell order included. The turn log is append-only, so a
+    record keeps just its length and rewinding truncates it.
+    """
+
+    def __init__(self, capacity=300):
+        self.entries = deque(maxlen=capacity)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+
+    def step(self, world, direction=None):
+        """world.step(direction), recording how to undo it."""
+        if world.alive:
+            snake = world.snake
+            grid = snake.grid
+            tail = grid.index(*snake.body[-1])
+            # Food is only eaten, and the RNG only drawn from, one step away
+            head_x, head_y = snake.head
+            food_x, food_y = world.food.position
+            in_reach = abs(head_x - food_x) + abs(head_y - food_y) == 1
+            self.entries.append((
+                world.ticks, world.last_direction, len(world.inputs),
+                world.rng.getstate() if in_reach else None, world.food.position,
+                snake.direction, tuple(snake.input_queue), snake.length, snake.speed,
+                snake.score, snake.growth_pending, snake.vacated, snake.hit_self,
+                tail, grid.slot[tail],
+            ))
+        return world.step(direction)
+
+    def rewind(self, world, steps=1):
+        # Undo up to steps ticks, newest first; False if there is nothing
+        # to go back to
+        if not self.entries:
+            return False
+        for _ in range(min(steps, len(self.entries))):
+            self.undo(world, self.entries.pop())
+        return True
+
+    @staticmethod
+    def undo(world, entry):
+        (ticks, last_direction, input_count, rng_state, food, direction, queue, length,
+         speed, score, growth_pending, vacated, hit_self, tail, tail_slot) = entry
+        snake = world.snake
+        grid = snake.grid
+        free, slot = grid.free, grid.slot
+
+        # Take the head off its cell, reversing Grid.occupy (which moved
+        # the last free cell into the head's slot, unless it was the head)
+        index = grid.index(*snake.body.popleft())
+        if index >= 0 and not snake.hit_self:
+            grid.occupied[index] = 0
+            position = slot[index]
+            if position < len(free):
+                last = free[position]
+                free[position] = index
+                slot[last] = len(free)
+                free.append(last)
+            else:
+                free.append(index)
+
+        # Put back a tail that moved on, reversing Grid.release
+        if growth_pending == 0:
+            free.pop()
+            grid.occupied[tail] = 1
+            slot[tail] = tail_slot
+            snake.body.append([tail % world.cols, tail // world.cols])
+
+        snake.head = list(snake.body[0])
+        snake.direction = direction
+        snake.input_queue = deque(queue)
+        snake.length = length
+        snake.speed = speed
+        snake.score = score
+        snake.growth_pending = growth_pending
+        snake.vacated = vacated
+        snake.hit_self = hit_self
+
+        world.food.position = food
+        if rng_state is not None:
+            world.rng.setstate(rng_state)
+        world.ticks = ticks
+        world.alive = True
+        world.won = False
+        world.last_direction = last_direction
+        del world.inputs[input_count:]
+
+def save_file(world, path):
+    with open(path, "wb") as f:
+        f.write(save(world))
+
+def load_file(world, path):
+    with open(path, "rb") as f:
+        return restore(world, f.read())
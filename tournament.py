@@ -0,0 +1,270 @@
+"""Headless tournaments for bots and parameter sweeps, on every core.
+
+Each combination of bot policy, board size, FPS and ACCELERATION is a
+configuration, and every configuration plays the same seeded games, so
+differences between them come from the parameters and not from luck.
+Games fan out over a process pool whose workers live for the whole run:
+they import only the headless engine (never pygame), and per-board setup
+such as the autopilot's cycle is built once per worker and reused.
+
+Results stream back as games finish; each can be written as a JSON line,
+and a summary with score and length distributions, survival time and
+ticks/sec per configuration is printed at the end:
+
+    python tournament.py --games 1000 --policy greedy autopilot --fps 10 15
+    python tournament.py --games 200 --board 20x20 40x30 --output games.jsonl --summary summary.json
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import signal
+import statistics
+import sys
+import time
+from collections import namedtuple
+
+import engine
+from autopilot import Autopilot, board_cycle
+from engine import DIRECTIONS, OPPOSITE
+
+# One point in the parameter sweep
+Config = namedtuple("Config", "policy cols rows fps acceleration")
+
+DEFAULT_MAX_TICKS = 1_000_000  # Stops games that could otherwise run forever
+CHUNK_SIZE = 8  # Games handed to a worker at a time
+
+class RandomBot:
+    """Random moves that avoid walls and the body when it can."""
+
+    def __init__(self, cols, rows, rng):
+        self.rng = rng
+
+    def choose(self, world):
+        safe = safe_directions(world.snake)
+        return self.rng.choice(safe) if safe else world.snake.direction
+
+class GreedyBot:
+    """Straight for the food along free cells; no planning ahead."""
+
+    def __init__(self, cols, rows, rng):
+        self.rng = rng
+
+    def choose(self, world):
+        snake = world.snake
+        safe = safe_directions(snake)
+        if not safe:
+            return snake.direction
+        food_x, food_y = world.food.position
+        head_x, head_y = snake.head
+        return min(safe, key=lambda direction: (
+            abs(head_x + DIRECTIONS[direction][0] - food_x) + abs(head_y + DIRECTIONS[direction][1] - food_y),
+            self.rng.random(),
+        ))
+
+def safe_directions(snake):
+    # Directions whose next cell is on the board and free (or the tail,
+    # which moves out of the way unless the snake is growing)
+    grid = snake.grid
+    tail = grid.index(*snake.body[-1])
+    safe = []
+    for direction, (dx, dy) in DIRECTIONS.items():
+        if direction == OPPOSITE[snake.direction]:
+            continue
+        cell = grid.index(snake.head[0] + dx, snake.head[1] + dy)
+        if cell >= 0 and (not grid.occupied[cell] or (cell == tail and snake.growth_pending == 0)):
+            safe.append(direction)
+    return safe
+
+POLICIES = ("greedy", "random", "autopilot")
+
+# Per-worker state, reused across every game the worker plays
+_worlds = {}
+_autopilots = {}
+
+def init_worker():
+    # Ctrl+C is handled once, by the parent
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def get_policy(config, seed):
+    if config.policy == "autopilot":
+        key = (config.cols, config.rows)
+        if key not in _autopilots:
+            _autopilots[key] = Autopilot(config.cols, config.rows)
+        return _autopilots[key]
+    rng = random.Random(seed)
+    if config.policy == "greedy":
+        return GreedyBot(config.cols, config.rows, rng)
+    return RandomBot(config.cols, config.rows, rng)
+
+def play_game(job):
+    """Play one seeded game in a worker; returns its result as a dict."""
+    config, seed, max_ticks = job
+    key = (config.cols, config.rows, config.fps, config.acceleration)
+    world = _worlds.get(key)
+    if world is None:
+        world = _worlds[key] = engine.World(
+            config.cols, config.rows, seed=seed, base_speed=config.fps, acceleration=config.acceleration
+        )
+    else:
+        world.reset(seed)
+    policy = get_policy(config, seed)
+
+    # Survival time is game time: each tick lasts one move at the speed
+    # the snake had then, which is what FPS and ACCELERATION change
+    survival = 0.0
+    start = time.perf_counter()
+    while world.alive and world.ticks < max_ticks:
+        survival += 1 / world.snake.speed
+        world.step(policy.choose(world))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "config": config._asdict(),
+        "seed": seed,
+        "score": world.snake.score,
+        "length": len(world.snake.body),
+        "ticks": world.ticks,
+        "survival_s": survival,
+        "won": world.won,
+        "timed_out": world.alive,
+        "elapsed_s": elapsed,
+    }
+
+def distribution(values):
+    values = sorted(values)
+    count = len(values)
+    return {
+        "mean": statistics.fmean(values),
+        "stdev": statistics.pstdev(values),
+        "min": values[0],
+        "p10": values[int(0.1 * (count - 1))],
+        "p50": statistics.median(values),
+        "p90": values[int(0.9 * (count - 1))],
+        "max": values[-1],
+    }
+
+def summarize(results, configs=None):
+    # Per-configuration aggregates of a list of game results, in the
+    # order of configs if given (results arrive in any order)
+    games = {config: [] for config in configs or ()}
+    for result in results:
+        games.setdefault(Config(**result["config"]), []).append(result)
+    summary = []
+    for config, runs in games.items():
+        if not runs:
+            continue
+        ticks = sum(run["ticks"] for run in runs)
+        elapsed = sum(run["elapsed_s"] for run in runs)
+        summary.append({
+            "config": config._asdict(),
+            "games": len(runs),
+            "wins": sum(run["won"] for run in runs),
+            "timed_out": sum(run["timed_out"] for run in runs),
+            "score": distribution([run["score"] for run in runs]),
+            "length": distribution([run["length"] for run in runs]),
+            "survival_s": distribution([run["survival_s"] for run in runs]),
+            "ticks_per_sec": ticks / elapsed if elapsed else 0.0,
+        })
+    return summary
+
+def print_summary(summary, wall_time, workers):
+    print(f"{'policy':10s} {'board':>7s} {'fps':>5s} {'accel':>6s} {'games':>6s} {'wins':>5s} "
+          f"{'score p10/p50/p90':>19s} {'len mean':>8s} {'survival s':>10s} {'ticks/s':>10s}")
+    for entry in summary:
+        config = Config(**entry["config"])
+        score = entry["score"]
+        scores = f"{score['p10']:g}/{score['p50']:g}/{score['p90']:g}"
+        print(f"{config.policy:10s} {f'{config.cols}x{config.rows}':>7s} {config.fps:5g} "
+              f"{config.acceleration:6g} {entry['games']:6d} {entry['wins']:5d} "
+              f"{scores:>19s} "
+              f"{entry['length']['mean']:8.1f} {entry['survival_s']['mean']:10.1f} "
+              f"{entry['ticks_per_sec']:10,.0f}")
+    games = sum(entry["games"] for entry in summary)
+    print(f"{games} games in {wall_time:.1f} s on {workers} workers ({games / wall_time:,.1f} games/s)")
+
+def make_jobs(configs, games, seed, max_ticks):
+    # Game i of every configuration uses the same seed
+    for i in range(games):
+        for config in configs:
+            yield config, seed + i, max_ticks
+
+def run(configs, games, seed=0, workers=None, max_ticks=DEFAULT_MAX_TICKS, on_result=None):
+    """Play games per configuration across a process pool; returns results.
+
+    on_result is called with each result as it arrives.
+    """
+    results = []
+    with multiprocessing.Pool(workers, initializer=init_worker) as pool:
+        for result in pool.imap_unordered(
+            play_game, make_jobs(configs, games, seed, max_ticks), chunksize=CHUNK_SIZE
+        ):
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Run headless bot tournaments and parameter sweeps")
+    parser.add_argument("--games", type=int, default=100, help="games per configuration")
+    parser.add_argument("--policy", nargs="+", choices=POLICIES, default=["greedy"])
+    parser.add_argument("--board", nargs="+", type=engine.parse_board_size, default=[(engine.GRID_COLS, engine.GRID_ROWS)],
+                        metavar="COLSxROWS")
+    parser.add_argument("--fps", nargs="+", type=engine.parse_speed, default=[engine.FPS],
+                        help="base speed values to sweep")
+    parser.add_argument("--acceleration", nargs="+", type=engine.parse_acceleration, default=[engine.ACCELERATION],
+                        help="speed-up per food values to sweep")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--max-ticks", type=int, default=DEFAULT_MAX_TICKS, help="stop each game after this many ticks")
+    parser.add_argument("--output", metavar="PATH", help="write every game result as a JSON line")
+    parser.add_argument("--summary", metavar="PATH", help="write the summary as JSON")
+    args = parser.parse_args()
+
+    configs = [
+        Config(policy, cols, rows, fps, acceleration)
+        for policy, (cols, rows), fps, acceleration
+        in itertools.product(args.policy, args.board, args.fps, args.acceleration)
+    ]
+    for config in configs:
+        if config.policy == "autopilot":
+            try:
+                board_cycle(config.cols, config.rows)
+            except ValueError as e:
+                parser.error(f"autopilot: {e}")
+
+    total = len(configs) * args.games
+    output = open(args.output, "w") if args.output else None
+    done = 0
+
+    def on_result(result):
+        nonlocal done
+        done += 1
+        if output is not None:
+            output.write(json.dumps(result) + "\n")
+        if done % max(1, total // 20) == 0 or done == total:
+            print(f"\r{done}/{total} games", end="", file=sys.stderr, flush=True)
+
+    start = time.perf_counter()
+    try:
+        results = run(configs, args.games, args.seed, args.workers, args.max_ticks, on_result)
+    except KeyboardInterrupt:
+        print("\nInterrupted", file=sys.stderr)
+        return 1
+    finally:
+        if output is not None:
+            output.close()
+    wall_time = time.perf_counter() - start
+    print(file=sys.stderr)
+
+    summary = summarize(results, configs)
+    print_summary(summary, wall_time, args.workers)
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump({"wall_time_s": wall_time, "workers": args.workers, "configs": summary}, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())